@@ -0,0 +1,149 @@
+"""Vazão de leitura/escrita concorrente: conexão nova por operação (como antes) x database/db.py.
+
+Leitores fazem as consultas frequentes do servidor (id -> caminho e página da
+galeria) enquanto escritores inserem vídeos, todos em threads no mesmo processo
+e, com --processes, escritores em processos separados (como os workers).
+Mostra operações/s de cada lado e quantas falharam com "database is locked".
+
+Uso: python benchmarks/db_concurrency.py [--seconds 5] [--readers 8] [--writers 2] [--rows 20000] [--processes 0]
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import sqlite3
+import argparse
+import tempfile
+import threading
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from database import db
+
+READ_BY_ID = "SELECT path_original, path_processed FROM videos WHERE id = ?"
+READ_PAGE = "SELECT id, original_name, filter, created_at FROM videos ORDER BY created_at DESC, id DESC LIMIT 48"
+INSERT = "INSERT INTO videos (id, original_name, filter, created_at, path_processed) VALUES (?, ?, ?, ?, ?)"
+
+
+def new_row():
+    video_id = str(uuid.uuid4())
+    return (video_id, "video.mp4", "gray", f"2025-01-01T{time.perf_counter():.9f}", f"videos/{video_id}/processed/gray/video.mp4")
+
+
+class Legacy:
+    """Uma conexão por operação, journal padrão: o que as rotas faziam antes de database/db.py."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self, sql, params=()):
+        with sqlite3.connect(self.path, timeout=30) as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def write(self, sql, params):
+        with sqlite3.connect(self.path, timeout=30) as conn:
+            conn.execute(sql, params)
+            conn.commit()
+
+
+class Pooled:
+    def read(self, sql, params=()):
+        return db.query(sql, params)
+
+    def write(self, sql, params):
+        db.execute(sql, params)
+
+
+def build(path, rows, wal):
+    db.configure(path)
+    db.migrate()
+    db.executemany(INSERT, [new_row() for _ in range(rows)])
+    ids = [row["id"] for row in db.query("SELECT id FROM videos")]
+    if not wal:
+        # As conexões do pool abriram o arquivo em WAL; o modo antigo usa o journal padrão
+        db.configure(path)
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA journal_mode = DELETE")
+    return ids
+
+
+def worker_loop(backend, kind, ids, deadline, counts, lock):
+    done = failed = 0
+    while time.perf_counter() < deadline:
+        try:
+            if kind == "write":
+                backend.write(INSERT, new_row())
+            elif done % 10 == 0:
+                backend.read(READ_PAGE)
+            else:
+                backend.read(READ_BY_ID, (random.choice(ids),))
+            done += 1
+        except sqlite3.OperationalError:
+            failed += 1
+    with lock:
+        counts[kind] += done
+        counts[f"{kind}_failed"] += failed
+
+
+def process_writer(mode, path, seconds, result):
+    if mode == "db":
+        db.configure(path)
+        backend = Pooled()
+    else:
+        backend = Legacy(path)
+    counts = {"write": 0, "write_failed": 0}
+    worker_loop(backend, "write", [], time.perf_counter() + seconds, counts, threading.Lock())
+    result.put(counts)
+
+
+def run(mode, path, ids, args):
+    backend = Pooled() if mode == "db" else Legacy(path)
+    counts = {"read": 0, "read_failed": 0, "write": 0, "write_failed": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    result = multiprocessing.get_context("spawn").Queue()
+    processes = [multiprocessing.get_context("spawn").Process(target=process_writer, args=(mode, path, args.seconds, result))
+                 for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+
+    threads = [threading.Thread(target=worker_loop, args=(backend, "read", ids, deadline, counts, lock))
+               for _ in range(args.readers)]
+    threads += [threading.Thread(target=worker_loop, args=(backend, "write", ids, deadline, counts, lock))
+                for _ in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for process in processes:
+        extra = result.get()
+        counts["write"] += extra["write"]
+        counts["write_failed"] += extra["write_failed"]
+        process.join()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--processes", type=int, default=0, help="escritores extras em processos separados")
+    args = parser.parse_args()
+
+    print(f"{'modo':<8} {'leituras/s':>11} {'escritas/s':>11} {'falhas':>7}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for mode in ("legacy", "db"):
+            path = os.path.join(work_dir, f"{mode}.db")
+            ids = build(path, args.rows, wal=(mode == "db"))
+            counts = run(mode, path, ids, args)
+            failed = counts["read_failed"] + counts["write_failed"]
+            print(f"{mode:<8} {counts['read'] / args.seconds:>11.0f} {counts['write'] / args.seconds:>11.0f} {failed:>7}")
+
+
+if __name__ == "__main__":
+    main()
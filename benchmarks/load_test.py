@@ -0,0 +1,290 @@
+"""Teste de carga HTTP do servidor: uploads, listagem, galeria, thumbnails, streaming e remoção.
+
+Copia src/ para uma pasta temporária (banco e mídia vazios), sobe o api.py de lá em
+127.0.0.1:5000 e envia alguns vídeos sintéticos (cv2.VideoWriter) como base. Depois
+--clients clientes simultâneos (threads, cada um com sua conexão keep-alive) repetem
+ações sorteadas pelos pesos de ACTIONS durante --seconds:
+- upload: POST /upload (octet-stream) e espera o job terminar consultando /jobs/<id>;
+- list: GET /api/videos;  gallery: GET /;
+- thumb: GET /thumbs/<id>?w=320;  thumbs_batch: POST /api/thumbs com até 20 ids;
+- stream: GET /videos/<id> com Range de STREAM_RANGE bytes num ponto aleatório;
+- delete: POST /video/<id>/delete de um vídeo enviado durante o teste.
+
+Para cada endpoint mostra requisições, erros (status >= 400 ou falha de conexão),
+requisições/s e latências p50/p95/p99/máx. Com vários níveis em --clients
+(ex.: 1,4,16) roda um após o outro no mesmo servidor, para ver onde a latência dispara.
+--url usa um servidor já rodando em vez de subir um (os vídeos base são enviados a ele).
+
+Uso: python benchmarks/load_test.py [--clients 1,4,16] [--seconds 20] [--seed-videos 5]
+                                    [--frames 60] [--size 320x240] [--url http://...] [--output carga.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import signal
+import argparse
+import tempfile
+import threading
+import subprocess
+import collections
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from parallel_check import make_synthetic_video
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+# O api.py escuta sempre nesta porta
+DEFAULT_URL = "http://127.0.0.1:5000"
+# Peso de cada ação no sorteio: leitura domina, como no uso real
+ACTIONS = {"list": 3, "gallery": 2, "thumb": 4, "thumbs_batch": 1, "stream": 4, "upload": 1, "delete": 1}
+# Bytes pedidos por requisição de streaming (um trecho, como o player faz)
+STREAM_RANGE = 256 * 1024
+# Intervalo entre consultas ao job, como o cliente desktop
+JOB_POLL_INTERVAL = 0.5
+REQUEST_TIMEOUT = 120
+
+
+class Stats:
+    """Latências por endpoint, alimentadas por todas as threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = collections.defaultdict(list)
+        self.errors = collections.Counter()
+
+    def record(self, endpoint, elapsed, ok):
+        with self.lock:
+            self.latencies[endpoint].append(elapsed)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def summary(self, duration):
+        rows = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            rows[endpoint] = {
+                "requests": len(values),
+                "errors": self.errors[endpoint],
+                "per_second": len(values) / duration,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": values[-1] * 1000,
+            }
+        return rows
+
+
+def percentile(sorted_values, p):
+    """Percentil pelo método nearest-rank."""
+    index = max(0, -(-len(sorted_values) * p // 100) - 1)
+    return sorted_values[int(index)]
+
+
+class Videos:
+    """Ids disponíveis para leitura; `own` são os enviados durante o teste, os únicos apagados."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = []
+        self.own = []
+        self.sizes = {}
+
+    def add(self, video_id, own=False):
+        with self.lock:
+            self.ids.append(video_id)
+            if own:
+                self.own.append(video_id)
+
+    def pick(self, count=1):
+        with self.lock:
+            return random.sample(self.ids, min(count, len(self.ids)))
+
+    def take_own(self):
+        with self.lock:
+            if not self.own:
+                return None
+            video_id = self.own.pop(random.randrange(len(self.own)))
+            self.ids.remove(video_id)
+            return video_id
+
+
+class Client:
+    def __init__(self, base_url, stats, videos, payloads):
+        self.base_url = base_url
+        self.stats = stats
+        self.videos = videos
+        self.payloads = payloads
+        self.session = requests.Session()
+
+    def request(self, endpoint, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=REQUEST_TIMEOUT,
+                                            allow_redirects=False, **kwargs)
+            # Conta o tempo até o último byte, não só até os cabeçalhos
+            response.content
+        except requests.RequestException:
+            self.stats.record(endpoint, time.perf_counter() - started, False)
+            return None
+        self.stats.record(endpoint, time.perf_counter() - started, response.status_code < 400)
+        return response
+
+    def upload(self, own=True):
+        name, data = random.choice(self.payloads)
+        started = time.perf_counter()
+        response = self.request("POST /upload", "POST", "/upload", data=data,
+                                params={"filter": "gray", "filename": name},
+                                headers={"Content-Type": "application/octet-stream"})
+        if response is None or response.status_code != 202:
+            return
+        job = response.json()
+        while True:
+            time.sleep(JOB_POLL_INTERVAL)
+            status = self.request("GET /jobs/<id>", "GET", f"/jobs/{job['job_id']}")
+            if status is None or status.status_code != 200:
+                return
+            if status.json()["status"] in ("done", "failed"):
+                break
+        ok = status.json()["status"] == "done"
+        # Tempo que o usuário espera: envio + fila + processamento
+        self.stats.record("upload até o job terminar", time.perf_counter() - started, ok)
+        if ok:
+            self.videos.add(job["id"], own)
+
+    def list(self):
+        self.request("GET /api/videos", "GET", "/api/videos", params={"limit": 100})
+
+    def gallery(self):
+        self.request("GET /", "GET", "/")
+
+    def thumb(self):
+        for video_id in self.videos.pick():
+            self.request("GET /thumbs/<id>", "GET", f"/thumbs/{video_id}", params={"w": 320})
+
+    def thumbs_batch(self):
+        video_ids = self.videos.pick(20)
+        if video_ids:
+            self.request("POST /api/thumbs", "POST", "/api/thumbs", json={"ids": video_ids, "w": 320})
+
+    def stream(self):
+        for video_id in self.videos.pick():
+            # O tamanho vem do Content-Range da primeira resposta
+            total = self.videos.sizes.get(video_id, 0)
+            start = random.randrange(max(total - STREAM_RANGE, 0) + 1)
+            response = self.request("GET /videos/<id> (Range)", "GET", f"/videos/{video_id}",
+                                    headers={"Range": f"bytes={start}-{start + STREAM_RANGE - 1}"})
+            if response is not None and "Content-Range" in response.headers:
+                self.videos.sizes[video_id] = int(response.headers["Content-Range"].rsplit("/", 1)[1])
+
+    def delete(self):
+        video_id = self.videos.take_own()
+        if video_id:
+            self.request("POST /video/<id>/delete", "POST", f"/video/{video_id}/delete")
+
+    def run(self, deadline):
+        names, weights = zip(*ACTIONS.items())
+        while time.monotonic() < deadline:
+            getattr(self, random.choices(names, weights)[0])()
+
+
+def make_payloads(work_dir, frames, size):
+    """Três vídeos sintéticos com durações diferentes, já em memória."""
+    payloads = []
+    for index, length in enumerate((frames, frames * 2, frames // 2 or 1)):
+        path = os.path.join(work_dir, f"synthetic_{index}.mp4")
+        make_synthetic_video(path, length, size)
+        with open(path, "rb") as f:
+            payloads.append((f"synthetic_{index}.mp4", f.read()))
+    return payloads
+
+
+def start_server(work_dir):
+    """Sobe o api.py de uma cópia de src/ em `work_dir`, com banco e mídia vazios."""
+    copy_dir = os.path.join(work_dir, "src")
+    shutil.copytree(SRC_DIR, copy_dir, ignore=shutil.ignore_patterns(
+        "__pycache__", "*.db", "*.db-wal", "*.db-shm", "media", "client", "*.png", "*.jpg"))
+    # Sessão própria: o reloader do modo debug cria um processo filho, e os dois precisam ser encerrados
+    return subprocess.Popen([sys.executable, "api.py"], cwd=os.path.join(copy_dir, "server"),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+
+
+def wait_ready(base_url, server, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            sys.exit("O api.py terminou ao iniciar (porta 5000 ocupada?)")
+        try:
+            if requests.get(base_url + "/filters", timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    sys.exit(f"O servidor não respondeu em {timeout}s")
+
+
+def print_summary(clients, duration, rows):
+    total = sum(row["requests"] for row in rows.values())
+    print(f"\n{clients} cliente(s), {duration:.1f}s, {total / duration:.1f} req/s no total")
+    print(f"{'endpoint':<28} {'req':>6} {'erros':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9}")
+    for endpoint, row in rows.items():
+        print(f"{endpoint:<28} {row['requests']:>6} {row['errors']:>6} {row['per_second']:>8.1f} "
+              f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['max_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", default="1,4,16", help="níveis de concorrência, separados por vírgula")
+    parser.add_argument("--seconds", type=float, default=20, help="duração de cada nível")
+    parser.add_argument("--seed-videos", type=int, default=5, help="vídeos enviados antes da carga")
+    parser.add_argument("--frames", type=int, default=60, help="frames do vídeo sintético base")
+    parser.add_argument("--size", default="320x240")
+    parser.add_argument("--url", help="servidor já rodando (não sobe um api.py)")
+    parser.add_argument("--output", help="grava os resultados neste JSON")
+    args = parser.parse_args()
+    size = tuple(map(int, args.size.split("x")))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        payloads = make_payloads(work_dir, args.frames, size)
+        server = None if args.url else start_server(work_dir)
+        base_url = (args.url or DEFAULT_URL).rstrip("/")
+        try:
+            wait_ready(base_url, server)
+            videos = Videos()
+            seeder = Client(base_url, Stats(), videos, payloads)
+            for _ in range(args.seed_videos):
+                seeder.upload(own=False)
+            if not videos.ids:
+                sys.exit("Nenhum vídeo base foi processado")
+
+            results = {}
+            for clients in map(int, args.clients.split(",")):
+                stats = Stats()
+                deadline = time.monotonic() + args.seconds
+                started = time.perf_counter()
+                threads = [threading.Thread(target=Client(base_url, stats, videos, payloads).run, args=(deadline,))
+                           for _ in range(clients)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                # Inclui a espera dos uploads que ainda estavam em andamento no fim do prazo
+                duration = time.perf_counter() - started
+                results[clients] = stats.summary(duration)
+                print_summary(clients, duration, results[clients])
+        finally:
+            if server is not None:
+                os.killpg(server.pid, signal.SIGTERM)
+                server.wait()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
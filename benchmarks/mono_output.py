@@ -0,0 +1,51 @@
+"""Compara a saída em um canal com a saída BGR para filtros monocromáticos.
+
+Para cada filtro e resolução, roda process_video com e sem mono_output e mostra
+a vazão (frames/s) e o tamanho do arquivo gerado.
+
+Uso: python benchmarks/mono_output.py [--frames 300] [--filters gray,edges,pixel+gray]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "server"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from processing.video import process_video
+from parallel_check import make_synthetic_video
+
+RESOLUTIONS = [(320, 240), (1280, 720), (1920, 1080)]
+
+
+def run(input_path, output_path, filter_type, mono_output, frames):
+    started = time.perf_counter()
+    process_video(input_path, output_path, filter_type, mono_output=mono_output)
+    elapsed = time.perf_counter() - started
+    return frames / elapsed, os.path.getsize(output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--filters", default="gray,edges,pixel+gray")
+    args = parser.parse_args()
+
+    print(f"{'filtro':<12} {'resolução':<10} {'BGR fps':>9} {'mono fps':>9} {'ganho':>7} {'BGR KB':>9} {'mono KB':>9}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for width, height in RESOLUTIONS:
+            input_path = os.path.join(work_dir, f"input_{width}x{height}.mp4")
+            make_synthetic_video(input_path, args.frames, (width, height))
+
+            for filter_type in args.filters.split(","):
+                output_path = os.path.join(work_dir, "output.mp4")
+                bgr_fps, bgr_size = run(input_path, output_path, filter_type, False, args.frames)
+                mono_fps, mono_size = run(input_path, output_path, filter_type, True, args.frames)
+                print(f"{filter_type:<12} {f'{width}x{height}':<10} {bgr_fps:>9.1f} {mono_fps:>9.1f} "
+                      f"{mono_fps / bgr_fps:>6.2f}x {bgr_size // 1024:>9} {mono_size // 1024:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Compara o modo por segmentos (processing/parallel.py) com o caminho serial.
+
+Verifica se os dois produzem o mesmo número de frames e os mesmos frames filtrados
+(MD5 frame a frame) e mostra o tempo de cada um.
+
+Uso: python benchmarks/parallel_check.py [video] [--workers N] [--filter gray]
+"""
+import os
+import sys
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "server"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from filters import registry
+from processing.video import process_video
+from processing.parallel import process_video_parallel
+
+
+def make_synthetic_video(path, frames=600, size=(640, 360), fps=30):
+    """Gera um vídeo com frames distintos (número do frame desenhado)."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for index in range(frames):
+        frame = np.full((size[1], size[0], 3), (index * 7 % 256, 90, 160), np.uint8)
+        cv2.putText(frame, str(index), (20, size[1] // 2), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+        writer.write(frame)
+    writer.release()
+
+
+def serial_digests(input_path, filter_type):
+    chain = registry.compile_chain(filter_type)
+    video_capture = cv2.VideoCapture(input_path)
+    digests = []
+    while True:
+        ok, frame = video_capture.read()
+        if not ok:
+            break
+        digests.append(hashlib.md5(chain.apply_native(frame).tobytes()).hexdigest())
+    video_capture.release()
+    return digests
+
+
+def count_frames(path):
+    video_capture = cv2.VideoCapture(path)
+    count = 0
+    while video_capture.grab():
+        count += 1
+    video_capture.release()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("video", nargs="?")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--filter", default="gray")
+    args = parser.parse_args()
+    if shutil.which("ffmpeg") is None:
+        sys.exit("O modo por segmentos precisa do ffmpeg no PATH")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = args.video
+        if input_path is None:
+            input_path = os.path.join(work_dir, "input.mp4")
+            make_synthetic_video(input_path)
+
+        serial_path = os.path.join(work_dir, "serial.mp4")
+        parallel_path = os.path.join(work_dir, "parallel.mp4")
+
+        started = time.perf_counter()
+        process_video(input_path, serial_path, args.filter)
+        serial_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        info = process_video_parallel(input_path, parallel_path, args.filter, args.workers, collect_digests=True)
+        frames, digests = info["frames"], info["digests"]
+        parallel_time = time.perf_counter() - started
+
+        expected = serial_digests(input_path, args.filter)
+        serial_frames = count_frames(serial_path)
+        parallel_frames = count_frames(parallel_path)
+
+    print(f"serial:   {serial_frames} frames em {serial_time:.2f}s")
+    print(f"paralelo: {parallel_frames} frames em {parallel_time:.2f}s ({args.workers} workers)")
+
+    ok = frames == parallel_frames == serial_frames == len(expected) and digests == expected
+    if digests != expected:
+        mismatch = next((i for i, (a, b) in enumerate(zip(digests, expected)) if a != b), min(len(digests), len(expected)))
+        print(f"primeiro frame divergente: {mismatch}")
+    print("OK" if ok else "FALHOU")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
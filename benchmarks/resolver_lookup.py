@@ -0,0 +1,82 @@
+"""Latência de id -> caminho com o resolver (banco + LRU) e com a busca antiga por os.walk.
+
+Para cada tamanho de biblioteca, cria um banco temporário com N vídeos na
+estrutura AAAA/MM/DD/<id> e mede o tempo médio por consulta com o cache frio
+(consulta pela chave primária) e quente (só o LRU). O os.walk cria a árvore
+de pastas de verdade, então só roda até --walk-max vídeos.
+
+Uso: python benchmarks/resolver_lookup.py [--sizes 100,1000,10000,100000] [--lookups 2000] [--walk-max 1000]
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "server"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from storage import manager, resolver
+from database import db
+
+
+def build_library(work_dir, count, with_tree):
+    db.configure(os.path.join(work_dir, f"videos_{count}.db"))
+    manager.init_db()
+
+    videos_root = os.path.join(work_dir, f"videos_{count}")
+    ids, rows = [], []
+    for i in range(count):
+        video_id = str(uuid.uuid4())
+        video_dir = os.path.join(videos_root, "2025", f"{i % 12 + 1:02d}", f"{i % 28 + 1:02d}", video_id)
+        processed = os.path.join(video_dir, "processed", "gray", "video.mp4")
+        rows.append((video_id, f"video_{i}.mp4", "gray", os.path.join(video_dir, "original", "video.mp4"), processed))
+        ids.append(video_id)
+        if with_tree:
+            os.makedirs(os.path.dirname(processed))
+            os.makedirs(os.path.join(video_dir, "thumbs"))
+            open(processed, "wb").close()
+
+    db.executemany("INSERT INTO videos (id, original_name, filter, path_original, path_processed) VALUES (?, ?, ?, ?, ?)", rows)
+    return ids, videos_root
+
+
+def walk_lookup(videos_root, video_id):
+    # Mesma busca que serve_video fazia antes do resolver
+    for root_dir, sub_dirs, files in os.walk(videos_root):
+        if video_id in root_dir and "video.mp4" in files and os.path.basename(root_dir) != "original":
+            return os.path.join(root_dir, "video.mp4")
+
+
+def timed(lookup, ids):
+    started = time.perf_counter()
+    for video_id in ids:
+        lookup(video_id)
+    return (time.perf_counter() - started) / len(ids) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000,100000")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--walk-max", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'vídeos':>8} {'frio µs':>9} {'quente µs':>10} {'os.walk µs':>11}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for count in map(int, args.sizes.split(",")):
+            with_tree = count <= args.walk_max
+            ids, videos_root = build_library(work_dir, count, with_tree)
+            sample = random.choices(ids, k=args.lookups)
+
+            resolver.clear()
+            cold = timed(resolver.resolve, list(dict.fromkeys(sample)))
+            warm = timed(resolver.resolve, sample)
+            walk = f"{timed(lambda video_id: walk_lookup(videos_root, video_id), sample[:50]):>11.1f}" if with_tree else f"{'-':>11}"
+            print(f"{count:>8} {cold:>9.1f} {warm:>10.1f} {walk}")
+
+
+if __name__ == "__main__":
+    main()
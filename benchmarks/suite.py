@@ -0,0 +1,189 @@
+"""Suíte de microbenchmarks dos filtros e do processamento, com resultados em JSON.
+
+Gera vídeos sintéticos (cv2.VideoWriter) em algumas resoluções e durações e mede:
+- vazão (frames/s) de apply, apply_native e apply_batch de cada filtro de src/filters;
+- tempo de ponta a ponta de process_video (com thumbnails e sprite) e de
+  manager.compute_checksum.
+
+Cada medida é o melhor de --repeat execuções. Com --output os resultados vão para um
+JSON; com --baseline eles são comparados a um JSON salvo antes e as pioras acima de
+--threshold são marcadas como regressão (código de saída 1). --results compara um
+JSON já gerado, sem rodar nada.
+
+Uso: python benchmarks/suite.py [--output atual.json] [--baseline base.json] [--threshold 0.1]
+                                [--resolutions 320x240,1280x720,1920x1080] [--frames 60,300]
+                                [--repeat 3] [--results atual.json] [--quick]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import platform
+import tempfile
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "server"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from filters import registry
+from storage import manager
+from processing.video import process_video
+from parallel_check import make_synthetic_video
+
+# Frames usados nas medidas dos filtros isolados (lidos uma vez para a memória)
+FILTER_FRAMES = 60
+
+
+def best_time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def read_frames(path, count):
+    video_capture = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        ok, frame = video_capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    video_capture.release()
+    return frames
+
+
+def bench_filters(input_path, label, repeat, results):
+    frames = read_frames(input_path, FILTER_FRAMES)
+    stack = np.stack(frames)
+    for name, module in registry.FILTERS.items():
+        for variant, run in (
+            ("apply", lambda: [module.apply(frame) for frame in frames]),
+            ("apply_native", lambda: [module.apply_native(frame) for frame in frames]),
+            ("apply_batch", lambda: module.apply_batch(stack)),
+        ):
+            results[f"filter.{name}.{variant}.{label}"] = {
+                "value": len(frames) / best_time(run, repeat), "unit": "frames/s", "better": "higher"}
+
+
+def bench_end_to_end(input_path, label, frames, work_dir, repeat, results):
+    output_path = os.path.join(work_dir, "output.mp4")
+    thumbs_dir = os.path.join(work_dir, "thumbs")
+    os.makedirs(thumbs_dir, exist_ok=True)
+    thumbnail_path = os.path.join(thumbs_dir, "thumb.jpg")
+
+    elapsed = best_time(lambda: process_video(input_path, output_path, "gray", thumbnail_path=thumbnail_path), repeat)
+    results[f"process_video.gray.{label}"] = {"value": elapsed, "unit": "s", "better": "lower"}
+    results[f"process_video.gray.{label}.fps"] = {"value": frames / elapsed, "unit": "frames/s", "better": "higher"}
+
+    size_mb = os.path.getsize(input_path) / 1024 / 1024
+    elapsed = best_time(lambda: manager.compute_checksum(input_path), repeat)
+    results[f"compute_checksum.{label}"] = {"value": elapsed, "unit": "s", "better": "lower"}
+    results[f"compute_checksum.{label}.throughput"] = {"value": size_mb / elapsed, "unit": "MB/s", "better": "higher"}
+
+
+def run_suite(args):
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for resolution in args.resolutions.split(","):
+            width, height = map(int, resolution.split("x"))
+            for frames in map(int, args.frames.split(",")):
+                label = f"{width}x{height}.{frames}f"
+                input_path = os.path.join(work_dir, f"input_{label}.mp4")
+                make_synthetic_video(input_path, frames, (width, height))
+                print(f"rodando {label}...", file=sys.stderr)
+
+                # Os filtros isolados não dependem da duração: mede só no vídeo mais curto
+                if frames == min(map(int, args.frames.split(","))):
+                    bench_filters(input_path, resolution, args.repeat, results)
+                bench_end_to_end(input_path, label, frames, work_dir, args.repeat, results)
+    return {
+        "meta": {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Imprime a comparação métrica a métrica e retorna a lista de regressões."""
+    regressions = []
+    print(f"{'métrica':<44} {'base':>11} {'atual':>11} {'variação':>9}  ")
+    for name, entry in sorted(current["results"].items()):
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<44} {'-':>11} {entry['value']:>11.4f} {'nova':>9}")
+            continue
+        change = entry["value"] / base["value"] - 1 if base["value"] else 0.0
+        # Variação no sentido "pior": queda para frames/s e MB/s, aumento para segundos
+        worse = -change if entry["better"] == "higher" else change
+        status = ""
+        if worse > threshold:
+            status = "REGRESSÃO"
+            regressions.append(name)
+        elif worse < -threshold:
+            status = "melhora"
+        print(f"{name:<44} {base['value']:>11.4f} {entry['value']:>11.4f} {change:>+8.1%}  {status}")
+
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    if missing:
+        print(f"\nNa base mas não na execução atual: {', '.join(missing)}")
+    return regressions
+
+
+def print_results(current):
+    print(f"{'métrica':<44} {'valor':>11}  unidade")
+    for name, entry in sorted(current["results"].items()):
+        print(f"{name:<44} {entry['value']:>11.4f}  {entry['unit']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="grava os resultados neste JSON")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--results", help="compara este JSON com --baseline, sem rodar os benchmarks")
+    parser.add_argument("--threshold", type=float, default=0.10, help="piora relativa tratada como regressão")
+    parser.add_argument("--resolutions", default="320x240,1280x720,1920x1080")
+    parser.add_argument("--frames", default="60,300")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="só 320x240 com 30 frames, uma repetição")
+    args = parser.parse_args()
+    if args.quick:
+        args.resolutions, args.frames, args.repeat = "320x240", "30", 1
+
+    if args.results:
+        with open(args.results, encoding="utf-8") as f:
+            current = json.load(f)
+    else:
+        current = run_suite(args)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(current, f, indent=2)
+
+    if not args.baseline:
+        print_results(current)
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regressão(ões) acima de {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\nSem regressões acima de {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,82 @@ import requests
 from PIL import Image, ImageTk, ImageDraw
 import io
 import os
+import sys
+import json
+import time
+import queue
+import struct
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
 import cv2
+import numpy as np
+
+from thumb_cache import ThumbnailDiskCache
+from thumb_store import ThumbnailStore
+
+# Os filtros ficam em src/filters, compartilhados com o servidor
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
+
+from filters import registry
+
+# Threads para falar com o servidor sem travar a janela
+BACKGROUND_WORKERS = 4
+# Intervalo (ms) entre verificações da fila de resultados e tempo máximo (s) gasto em cada uma
+UI_POLL_MS = 30
+UI_DRAIN_BUDGET = 0.015
+
+# Uploads enviados ao mesmo tempo (os demais esperam na fila) e tempo máximo sem resposta do servidor
+UPLOAD_CONCURRENCY = int(os.environ.get("VIDEO_CLIENT_UPLOADS", 2))
+UPLOAD_TIMEOUT = (5, 300)
+# Intervalo mínimo entre atualizações da barra de progresso, em segundos
+PROGRESS_INTERVAL = 0.1
+
+# Largura das thumbnails do histórico pedida ao servidor
+HISTORY_THUMB_WIDTH = 320
+# Intervalo (ms) entre atualizações do uso de memória na barra de informações
+MEMORY_REPORT_MS = 1000
+
+# Memória máxima das imagens de preview já redimensionadas e espera (ms) depois do último
+# evento de redimensionamento da janela antes de redesenhar
+RENDER_CACHE_BYTES = 64 * 1024 * 1024
+RESIZE_DEBOUNCE_MS = 150
+
+# Prévia local dos filtros: quantos frames do vídeo e a largura de cada quadro (original | filtrado)
+PREVIEW_SAMPLES = 3
+PREVIEW_CELL_WIDTH = 480
+
+# Usados enquanto /filters não responde (ou se falhar)
+DEFAULT_FILTERS = [
+    {"name": "gray", "description": "Escala de Cinza"},
+    {"name": "edges", "description": "Detecção de Bordas"},
+    {"name": "pixel", "description": "Pixelização"},
+]
+
+class ProgressFile:
+    """Arquivo aberto para envio que informa os bytes já lidos (o requests lê em blocos)"""
+
+    def __init__(self, file, size, callback):
+        self.file = file
+        self.size = size
+        self.callback = callback
+        self.sent = 0
+        self.last_report = 0.0
+
+    def __len__(self):
+        # Content-Length conhecido: o corpo vai em blocos, sem transferência chunked
+        return self.size
+
+    def read(self, size=-1):
+        chunk = self.file.read(size)
+        self.sent += len(chunk)
+        now = time.monotonic()
+        if now - self.last_report >= PROGRESS_INTERVAL or not chunk:
+            self.last_report = now
+            self.callback(self.sent)
+        return chunk
 
 class VideoClient:
     def __init__(self, root):
@@ -17,16 +92,69 @@ class VideoClient:
         self.server_url = "http://10.180.43.186:5000"
         # self.server_url = "http://10.180.43.11:5000"
 
-        self.original_thumbnails = {}
-        self.filtered_thumbnails = {}
+        # Thumbnails em memória, reduzidas e comprimidas: por entrada (vídeo selecionado,
+        # upload) ou por id (histórico do servidor, carregadas do cache em disco quando usadas)
+        self.thumbnails = ThumbnailStore()
         self.video_path = None
-
-        self.get_filters()
+        self.history_entries = set()
+        # Histórico vindo do servidor: entrada -> id do vídeo
+        self.history_ids = {}
+        self.thumb_cache = ThumbnailDiskCache()
+
+        # Preview: imagem atual (chave, função que carrega) e cache das versões já
+        # redimensionadas por (chave, largura, altura); o LANCZOS roda em render_executor
+        self.preview = None
+        self.render_cache = collections.OrderedDict()
+        self.render_cache_bytes = 0
+        self.render_token = 0
+        self.resize_job = None
+        self.filter_preview_token = 0
+        self.filters = DEFAULT_FILTERS
+
+        # Rede e decodificação rodam no pool; os resultados voltam para a thread do Tk
+        # pela ui_queue, esvaziada periodicamente por drain_ui_queue
+        self.executor = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS)
+        # Pool próprio dos uploads: o tamanho dele é o limite de envios simultâneos
+        self.upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY)
+        self.render_executor = ThreadPoolExecutor(max_workers=1)
+        self.ui_queue = queue.Queue()
+        self.history_cancel = threading.Event()
 
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.drain_ui_queue()
+        self.report_memory()
+
+        self.executor.submit(self.get_filters)
         self.load_history_from_server()
 
+    def call_in_ui(self, callback, *args):
+        """Agenda callback(*args) na thread do Tk (pode ser chamado de qualquer thread)"""
+        self.ui_queue.put((callback, args))
+
+    def drain_ui_queue(self):
+        """Executa os callbacks enfileirados pelas threads, sem passar de UI_DRAIN_BUDGET por vez"""
+        deadline = time.perf_counter() + UI_DRAIN_BUDGET
+        while time.perf_counter() < deadline:
+            try:
+                callback, args = self.ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print("Erro ao atualizar a interface:", e)
+        self.root.after(UI_POLL_MS, self.drain_ui_queue)
+
+    def on_close(self):
+        self.history_cancel.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.upload_executor.shutdown(wait=False, cancel_futures=True)
+        self.render_executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
     def get_filters(self):
+        """(thread) Busca os filtros do servidor; até responder, o combo mostra DEFAULT_FILTERS"""
         try:
             response = requests.get(f"{self.server_url}/filters", timeout=5)
             response.raise_for_status()
@@ -34,18 +162,21 @@ class VideoClient:
 
             # Se vier como dict com chave "filters"
             if isinstance(data, dict) and "available_filters" in data:
-                self.filters = data["available_filters"]
+                self.call_in_ui(self.set_filters, data["available_filters"])
             else:
                 raise ValueError("Formato inesperado da resposta da API")
 
         except Exception as e:
             print("Erro ao buscar filtros:", e)
-            # fallback se a API falhar
-            self.filters = [
-                {"name": "gray", "description": "Escala de Cinza"},
-                {"name": "edges", "description": "Detecção de Bordas"},
-                {"name": "pixel", "description": "Pixelização"},
-            ]
+
+    def set_filters(self, filters):
+        # Mantém a escolha do usuário se ela ainda existir
+        selected = self.filter_combo.get()
+        self.filters = filters
+        descriptions = [f["description"] for f in filters]
+        self.filter_combo.config(values=descriptions)
+        if descriptions:
+            self.filter_combo.current(descriptions.index(selected) if selected in descriptions else 0)
 
     def setup_ui(self):
         # Configurar o grid principal
@@ -107,6 +238,12 @@ class VideoClient:
 
         self.filter_combo.current(0)
         self.filter_combo.pack(pady=5)
+        self.filter_combo.bind("<<ComboboxSelected>>", self.on_filter_change)
+
+        self.preview_btn = tk.Button(filter_frame, text="👁️ Prévia do Filtro",
+                                     command=self.preview_filter,
+                                     font=("Arial", 9))
+        self.preview_btn.pack()
 
         # Frame para ação
         action_frame = tk.LabelFrame(control_frame, text="Processamento",
@@ -125,6 +262,10 @@ class VideoClient:
                                      font=("Arial", 9), fg="#666")
         self.status_label.pack()
 
+        # Uma linha (nome + barra de progresso) por upload na fila ou em andamento
+        self.uploads_frame = tk.Frame(action_frame)
+        self.uploads_frame.pack(fill="x")
+
     def create_main_content(self):
         """Cria o conteúdo principal com histórico e preview"""
         main_frame = tk.Frame(self.root)
@@ -154,7 +295,7 @@ class VideoClient:
 
         self.history_list = tk.Listbox(list_frame,
                                        font=("Arial", 10),
-                                       selectmode=tk.SINGLE,
+                                       selectmode=tk.BROWSE,
                                        bg="white",
                                        relief="sunken",
                                        bd=1)
@@ -188,6 +329,8 @@ class VideoClient:
         image_container = tk.Frame(
             preview_frame, bg="white", relief="sunken", bd=1)
         image_container.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+        image_container.bind("<Configure>", self.on_preview_resize)
+        self.image_container = image_container
 
         self.thumbnail_label = tk.Label(image_container,
                                         text="Selecione um vídeo para ver o preview",
@@ -195,7 +338,8 @@ class VideoClient:
                                         fg="#888",
                                         bg="white",
                                         compound="center")
-        self.thumbnail_label.pack(expand=True, fill="both")
+        # place (e não pack): o tamanho da imagem não altera o tamanho do container
+        self.thumbnail_label.place(relwidth=1, relheight=1)
 
         # Info frame
         info_frame = tk.Frame(preview_frame)
@@ -205,6 +349,10 @@ class VideoClient:
                                    font=("Arial", 9), fg="#666")
         self.info_label.pack()
 
+        self.memory_label = tk.Label(info_frame, text="",
+                                     font=("Arial", 8), fg="#999")
+        self.memory_label.pack()
+
     def create_image(self, color, name, fill):
         img = Image.new("RGB", (200, 150), color=color)
         draw = ImageDraw.Draw(img)
@@ -244,13 +392,13 @@ class VideoClient:
                 photo = self.create_thumb(img)
                 entry_text = f"📁 Selecionado: {video_name}"
 
-                self.save_image(entry_text, self.original_thumbnails,
-                                img, f"Arquivo: {video_name}")
+                self.save_image(entry_text, img, f"Arquivo: {video_name}")
 
             except Exception as e:
                 self.update_status(f"Erro: {str(e)}", error=True)
                 img = self.create_image("red", "Erro", "white")
                 photo = self.create_thumb(img)
+                self.preview = None
                 self.set_thumbnail_label(photo)
 
     def video_name(self):
@@ -260,16 +408,16 @@ class VideoClient:
         self.thumbnail_label.config(image=photo, text="")
         self.thumbnail_label.image = photo
 
-    def save_image(self, entry_text, dicio, photo, info_label):
+    def save_image(self, entry_text, photo, info_label):
         # Adicionar ao histórico sem duplicatas
-        items = self.history_list.get(0, tk.END)
-
-        if entry_text not in items:
+        if entry_text not in self.history_entries:
+            self.history_entries.add(entry_text)
             self.history_list.insert(tk.END, entry_text)
 
         # Salvar a thumbnail
-        self.resize_and_set_thumbnail(photo)
-        dicio[entry_text] = photo
+        self.thumbnails.put(entry_text, photo)
+        self.invalidate_render(entry_text)
+        self.show_preview(entry_text, lambda: self.thumbnails.get(entry_text))
         # self.history_list.insert(tk.END, entry_text)
         self.info_label.config(text=info_label)
 
@@ -283,6 +431,16 @@ class VideoClient:
             self.update_status("Selecione um vídeo primeiro!", error=True)
             return
 
+        filtro = self.selected_filter()
+
+        # O envio roda em segundo plano; a janela continua livre para novos uploads
+        video_name = self.video_name()
+        row = self.add_upload_row(video_name)
+        self.upload_executor.submit(self.run_upload, self.video_path, video_name, filtro, row)
+        self.update_status(f"{video_name} adicionado à fila de envio")
+
+    def selected_filter(self):
+        """Nome do filtro escolhido no combo (que mostra as descrições)"""
         selected_name = self.filter_combo.get()
         selected_filter = next(
             (f for f in self.filters if f["description"]
@@ -290,55 +448,157 @@ class VideoClient:
         )
 
         if selected_filter:
-            filtro = selected_filter["name"]
-        else:
-            filtro = selected_name
+            return selected_filter["name"]
+        return selected_name
 
-        # filtro = self.filter_combo.get()
-        self.update_status("Enviando vídeo para processamento...")
+    def preview_filter(self):
+        """Aplica o filtro escolhido a alguns frames do vídeo, localmente, sem enviar nada ao servidor"""
+        if not self.video_path:
+            self.update_status("Selecione um vídeo primeiro!", error=True)
+            return
 
-        # Desabilitar botão durante upload
-        self.upload_btn.config(state="disabled", text="⏳ Processando...")
+        filtro = self.selected_filter()
+        key = f"prévia:{self.video_path}:{filtro}"
+        self.info_label.config(text=f"Prévia local: {registry.describe(filtro)} (original | filtrado)")
+        # Já calculada (ex.: voltando a um filtro já comparado): aparece direto
+        if key in self.thumbnails:
+            self.show_preview(key, lambda: self.thumbnails.get(key))
+            return
 
-        try:
-            with open(self.video_path, "rb") as arquivo:
-                files = {"video": arquivo}
-                data = {"filter": filtro}
-                response = requests.post(
-                    f"{self.server_url}/upload", files=files, data=data, timeout=60)
+        self.update_status("Gerando prévia do filtro...")
+        self.filter_preview_token += 1
+        self.executor.submit(self.render_filter_preview, self.filter_preview_token, key, self.video_path, filtro)
 
-                if response.status_code == 200:
-                    data = response.json()
-                    thumb_url = data.get("thumb_url")
+    def on_filter_change(self, event):
+        # Com uma prévia na tela, trocar o filtro atualiza a prévia
+        if self.preview and self.preview[0].startswith("prévia:"):
+            self.preview_filter()
 
-                    if thumb_url:
-                        img_data = requests.get(thumb_url).content
-                        img = Image.open(io.BytesIO(img_data))
+    def render_filter_preview(self, token, key, video_path, filtro):
+        """(thread) Decodifica PREVIEW_SAMPLES frames espalhados pelo vídeo e monta original | filtrado"""
+        try:
+            chain = registry.compile_chain(filtro)
+        except ValueError:
+            self.call_in_ui(self.update_status, f"Filtro {filtro} não disponível no cliente", True)
+            return
 
-                        entry_text = f"🎬 {self.video_name()} | Filtro: {filtro}"
+        rows = []
+        cap = cv2.VideoCapture(video_path)
+        try:
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            for sample in range(PREVIEW_SAMPLES):
+                if token != self.filter_preview_token:
+                    return
+                if frame_count > 0:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_count * (2 * sample + 1) // (2 * PREVIEW_SAMPLES))
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                # Filtro na resolução original (a pixelização depende dela); a redução vem depois
+                filtered = chain.apply(frame)
+                height = frame.shape[0] * PREVIEW_CELL_WIDTH // frame.shape[1]
+                rows.append(np.hstack([
+                    cv2.resize(frame, (PREVIEW_CELL_WIDTH, height), interpolation=cv2.INTER_AREA),
+                    cv2.resize(filtered, (PREVIEW_CELL_WIDTH, height), interpolation=cv2.INTER_AREA),
+                ]))
+        except Exception as e:
+            self.call_in_ui(self.update_status, f"Erro na prévia: {str(e)}", True)
+            return
+        finally:
+            cap.release()
 
-                        self.save_image(
-                            entry_text, self.filtered_thumbnails, img, f"Processado com filtro: {filtro}")
+        if not rows:
+            self.call_in_ui(self.update_status, "Erro ao ler frames do vídeo", True)
+            return
+        img = Image.fromarray(cv2.cvtColor(np.vstack(rows), cv2.COLOR_BGR2RGB))
+        self.call_in_ui(self.show_filter_preview, token, key, img)
 
-                        self.update_status(
-                            "Processamento concluído com sucesso!")
-                    else:
-                        self.update_status(
-                            "Resposta inválida do servidor", error=True)
-                else:
-                    self.update_status(
-                        f"Erro no servidor: {response.status_code}", error=True)
+    def show_filter_preview(self, token, key, img):
+        self.thumbnails.put(key, img)
+        # Usuário já pediu outra prévia: guarda esta, mas não mostra
+        if token != self.filter_preview_token:
+            return
+        self.show_preview(key, lambda: self.thumbnails.get(key))
+        self.update_status("Prévia gerada localmente")
+
+    def add_upload_row(self, video_name):
+        row = tk.Frame(self.uploads_frame)
+        row.pack(fill="x", pady=(5, 0))
+        row.label = tk.Label(row, text=f"{video_name}: na fila", font=("Arial", 8), fg="#666", anchor="w")
+        row.label.pack(fill="x")
+        row.bar = ttk.Progressbar(row, length=180, maximum=100)
+        row.bar.pack(fill="x")
+        row.video_name = video_name
+        return row
+
+    def set_upload_progress(self, row, stage, percent):
+        row.label.config(text=f"{row.video_name}: {stage} {percent:.0f}%")
+        row.bar.config(value=percent)
+
+    def run_upload(self, video_path, video_name, filtro, row):
+        """(thread) Envia o vídeo em blocos, acompanha o processamento e baixa a thumbnail"""
+        try:
+            size = os.path.getsize(video_path)
+            with open(video_path, "rb") as arquivo:
+                body = ProgressFile(arquivo, size, lambda sent: self.call_in_ui(
+                    self.set_upload_progress, row, "enviando", sent * 100 / max(size, 1)))
+                # Corpo bruto (application/octet-stream): o servidor começa a processar antes do fim do envio
+                response = requests.post(
+                    f"{self.server_url}/upload", data=body,
+                    params={"filter": filtro, "filename": video_name, "size": size},
+                    headers={"Content-Type": "application/octet-stream"}, timeout=UPLOAD_TIMEOUT)
+
+            if response.status_code != 202:
+                self.call_in_ui(self.finish_upload, row, f"Erro no servidor: {response.status_code}", True)
+                return
+
+            # O servidor só enfileira o vídeo; aguardar o job terminar
+            job = response.json()
+            data = self.wait_for_job(job["status_url"], job["result_url"], lambda progress: self.call_in_ui(
+                self.set_upload_progress, row, "processando", progress * 100))
+            thumb_url = data.get("thumb_url")
+            if not thumb_url:
+                self.call_in_ui(self.finish_upload, row, "Resposta inválida do servidor", True)
+                return
+
+            img = Image.open(io.BytesIO(requests.get(thumb_url, timeout=5).content))
+            img.load()
+            entry_text = f"🎬 {video_name} | Filtro: {filtro}"
+            self.call_in_ui(self.save_image, entry_text, img,
+                            f"Processado com filtro: {filtro}")
+            self.call_in_ui(self.finish_upload, row, f"{video_name}: processamento concluído com sucesso!")
 
         except requests.exceptions.Timeout:
-            self.update_status(
-                "Timeout: Servidor demorou para responder", error=True)
+            self.call_in_ui(self.finish_upload, row, "Timeout: Servidor demorou para responder", True)
         except requests.exceptions.ConnectionError:
-            self.update_status("Erro de conexão com o servidor", error=True)
+            self.call_in_ui(self.finish_upload, row, "Erro de conexão com o servidor", True)
         except Exception as e:
-            self.update_status(f"Erro inesperado: {str(e)}", error=True)
-        finally:
-            # Reabilitar botão
-            self.upload_btn.config(state="normal", text="🚀 Processar Vídeo")
+            self.call_in_ui(self.finish_upload, row, f"Erro inesperado: {str(e)}", True)
+
+    def finish_upload(self, row, message, error=False):
+        self.update_status(message, error)
+        row.label.config(text=f"{row.video_name}: {'erro' if error else 'concluído'}")
+        row.bar.config(value=0 if error else 100)
+        # Mantém a linha visível por alguns segundos
+        self.root.after(5000, row.destroy)
+
+    def wait_for_job(self, status_url, result_url, on_progress=None, interval=1):
+        """(thread) Consulta o job até o processamento terminar e retorna o resultado"""
+        while True:
+            response = requests.get(status_url, timeout=5)
+            response.raise_for_status()
+            job = response.json()
+            if job["status"] == "done":
+                break
+            if job["status"] == "failed":
+                raise RuntimeError(job.get("error") or "falha no processamento")
+            if on_progress and job.get("progress") is not None:
+                on_progress(job["progress"])
+            time.sleep(interval)
+
+        response = requests.get(result_url, timeout=5)
+        response.raise_for_status()
+        return response.json()
 
     def update_status(self, message, error=False):
         """Atualiza a mensagem de status"""
@@ -355,78 +615,231 @@ class VideoClient:
             entry_text = event.widget.get(index)
 
             if entry_text.startswith("📁 Selecionado:"):
-                photo = self.original_thumbnails.get(entry_text)
                 self.info_label.config(text="Vídeo original selecionado")
             else:
-                photo = self.filtered_thumbnails.get(entry_text)
                 filter_name = entry_text.split(
                     "Filtro: ")[-1] if "Filtro: " in entry_text else "Processado"
                 self.info_label.config(
                     text=f"Vídeo processado - {filter_name}")
 
-            if photo:
-                self.resize_and_set_thumbnail(photo)
-                self.current_img = photo
+            if entry_text in self.thumbnails:
+                self.show_preview(entry_text, lambda: self.thumbnails.get(entry_text))
+            elif entry_text in self.history_ids:
+                # Thumbnail do servidor: lida do cache em disco na thread de render
+                video_id = self.history_ids[entry_text]
+                self.show_preview(entry_text, lambda: self.load_history_thumbnail(video_id))
 
     def clear_history(self):
         """Limpa o histórico"""
+        # Interrompe um carregamento em andamento: o que ainda chegar dele é descartado
+        self.history_cancel.set()
+        self.history_entries.clear()
         self.history_list.delete(0, tk.END)
-        self.original_thumbnails.clear()
-        self.filtered_thumbnails.clear()
+        self.thumbnails.clear()
+        self.history_ids.clear()
+        self.preview = None
+        self.render_token += 1
+        self.render_cache.clear()
+        self.render_cache_bytes = 0
         self.thumbnail_label.config(image="", text="Histórico limpo")
         self.info_label.config(text="")
 
-    def resize_and_set_thumbnail(self, img):
-        """Redimensiona a imagem para ocupar o espaço do thumbnail_label"""
-        container_width = self.thumbnail_label.winfo_width()
-        container_height = self.thumbnail_label.winfo_height()
+    def show_preview(self, key, load):
+        """Mostra no preview a imagem retornada por `load()`, redimensionada para o espaço disponível.
+
+        Se (key, tamanho) já estiver no render_cache, aparece na hora; senão load() e o
+        LANCZOS rodam na thread de render e a imagem aparece quando ficar pronta.
+        """
+        self.preview = (key, load)
+        self.render_preview()
 
-        if container_width <= 1 or container_height <= 1:
-            # Se ainda não foi renderizado, agenda para depois
-            self.thumbnail_label.after(
-                100, lambda: self.resize_and_set_thumbnail(img))
+    def render_preview(self):
+        if self.preview is None:
+            return
+        key, load = self.preview
+        size = (self.image_container.winfo_width(), self.image_container.winfo_height())
+        if size[0] <= 1 or size[1] <= 1:
+            # Ainda não foi desenhado: o <Configure> chama de novo
             return
 
-        # Redimensiona para caber exatamente no espaço
-        img_resized = img.resize(
-            (container_width, container_height), Image.LANCZOS)
+        # Um pedido novo invalida os anteriores ainda na fila de render
+        self.render_token += 1
+        photo = self.render_cache.get((key, *size))
+        if photo is not None:
+            self.render_cache.move_to_end((key, *size))
+            self.set_thumbnail_label(photo)
+            return
+        self.render_executor.submit(self.render_in_background, self.render_token, key, load, size)
 
+    def render_in_background(self, token, key, load, size):
+        """(thread de render) Carrega e redimensiona; pula pedidos que já foram superados"""
+        if token != self.render_token:
+            return
+        try:
+            img = load()
+            if img is None:
+                return
+            img_resized = img.resize(size, Image.LANCZOS)
+        except Exception as e:
+            print("Erro ao redimensionar o preview:", e)
+            return
+        self.call_in_ui(self.finish_render, token, key, size, img_resized)
+
+    def finish_render(self, token, key, size, img_resized):
+        # PhotoImage só pode ser criada na thread do Tk
         photo = ImageTk.PhotoImage(img_resized)
-        self.set_thumbnail_label(photo)
+        self.render_cache[(key, *size)] = photo
+        self.render_cache_bytes += size[0] * size[1] * 4
+        while self.render_cache_bytes > RENDER_CACHE_BYTES and len(self.render_cache) > 1:
+            (_, width, height), _ = self.render_cache.popitem(last=False)
+            self.render_cache_bytes -= width * height * 4
+
+        if token == self.render_token:
+            self.set_thumbnail_label(photo)
+
+    def invalidate_render(self, key):
+        """Descarta as versões redimensionadas de `key` (imagem trocada)"""
+        for cache_key in [cache_key for cache_key in self.render_cache if cache_key[0] == key]:
+            del self.render_cache[cache_key]
+            self.render_cache_bytes -= cache_key[1] * cache_key[2] * 4
+
+    def on_preview_resize(self, event):
+        # Arrastar a borda da janela gera um evento por pixel: redesenha só quando parar
+        if self.resize_job is not None:
+            self.root.after_cancel(self.resize_job)
+        self.resize_job = self.root.after(RESIZE_DEBOUNCE_MS, self.render_after_resize)
+
+    def render_after_resize(self):
+        self.resize_job = None
+        self.render_preview()
+
+    def fetch_thumbnails(self, video_ids, width=HISTORY_THUMB_WIDTH, etags=None):
+        """Baixa as thumbnails de vários vídeos de uma vez.
+
+        Com `etags` ({id: etag} das cópias locais), as que não mudaram não são baixadas.
+        Retorna ({id: (etag, bytes da imagem)}, ids não modificados, ids sem thumbnail).
+        """
+        thumbs, not_modified, missing = {}, [], []
+        # O servidor aceita até 1000 ids por chamada
+        for start in range(0, len(video_ids), 1000):
+            batch = video_ids[start:start + 1000]
+            payload = {"ids": batch, "w": width}
+            if etags:
+                payload["etags"] = {video_id: etags[video_id] for video_id in batch if video_id in etags}
+            response = requests.post(f"{self.server_url}/api/thumbs", json=payload, timeout=30)
+            response.raise_for_status()
+
+            # [tamanho do índice (4 bytes)][índice JSON][imagens concatenadas]
+            data = response.content
+            index_size = struct.unpack(">I", data[:4])[0]
+            index = json.loads(data[4:4 + index_size])
+            base = 4 + index_size
+            for thumb in index["thumbs"]:
+                thumbs[thumb["id"]] = (thumb.get("etag"), data[base + thumb["offset"]:base + thumb["offset"] + thumb["length"]])
+            not_modified += index.get("not_modified", [])
+            missing += index["missing"]
+        return thumbs, not_modified, missing
 
     def load_history_from_server(self):
-        """Carrega histórico do servidor (rota /api/videos)"""
+        """Carrega o histórico em segundo plano; a lista é preenchida aos poucos"""
+        self.history_cancel.set()
+        self.history_cancel = threading.Event()
+        self.executor.submit(self.fetch_history, self.history_cancel)
+
+    def fetch_history(self, cancel):
+        """(thread) Percorre /api/videos página por página; as thumbnails de cada página
+        são baixadas em paralelo enquanto a próxima página é buscada"""
         try:
-            response = requests.get(f"{self.server_url}/api/videos", timeout=5)
-            response.raise_for_status()
-            data = response.json()
+            params = {"fields": "id,original_name,filter", "limit": 500}
+            while not cancel.is_set():
+                response = requests.get(f"{self.server_url}/api/videos", params=params, timeout=5)
+                response.raise_for_status()
+                data = response.json()
+                videos = data.get("videos", [])
+
+                self.call_in_ui(self.add_history_entries, cancel, videos)
+                if videos:
+                    self.executor.submit(self.fetch_history_thumbnails, cancel, videos)
+
+                # Sem next_cursor: última página
+                if not data.get("next_cursor"):
+                    break
+                params["cursor"] = data["next_cursor"]
 
-            videos = data.get("videos", [])
-            print(f"Histórico carregado: {len(videos)} vídeos")
-
-            for v in videos:
-                entry_text = f"🎬 {v['original_name']} | Filtro: {v['filter']}"
-                thumb_url = v.get("thumbnail_url")
+        except Exception as e:
+            print("Erro ao buscar histórico do servidor:", e)
 
-                if thumb_url:
-                    try:
-                        img_data = requests.get(thumb_url, timeout=5).content
-                        img = Image.open(io.BytesIO(img_data))
+    def fetch_history_thumbnails(self, cancel, videos):
+        """(thread) Atualiza no cache em disco as thumbnails de uma página do histórico.
 
-                        # salvar no dicionário de processados
-                        self.filtered_thumbnails[entry_text] = img
+        Só baixa as que faltam ou mudaram no servidor; nada é decodificado aqui.
+        """
+        if cancel.is_set():
+            return
+        video_ids = [v["id"] for v in videos]
+        try:
+            etags = self.thumb_cache.etags(video_ids, HISTORY_THUMB_WIDTH)
+            thumbs, not_modified, missing = self.fetch_thumbnails(video_ids, HISTORY_THUMB_WIDTH, etags)
+            self.thumb_cache.put_many(HISTORY_THUMB_WIDTH, [(video_id, etag, data) for video_id, (etag, data) in thumbs.items()])
+            self.thumb_cache.touch(not_modified, HISTORY_THUMB_WIDTH)
+            self.thumb_cache.delete(missing, HISTORY_THUMB_WIDTH)
+        except Exception as e:
+            print("Erro ao buscar thumbnails do servidor:", e)
+            return
 
-                        # adicionar ao histórico se ainda não existir
-                        items = self.history_list.get(0, tk.END)
-                        if entry_text not in items:
-                            self.history_list.insert(tk.END, entry_text)
+        available = set(thumbs) | set(not_modified)
+        self.call_in_ui(self.set_history_thumbnails, cancel,
+                        {self.history_entry_text(v): v["id"] for v in videos if v["id"] in available})
 
-                    except Exception as e:
-                        print(
-                            f"Erro ao carregar thumbnail de {v['original_name']}: {e}")
+    def history_entry_text(self, video):
+        return f"🎬 {video['original_name']} | Filtro: {video['filter']}"
 
+    def add_history_entries(self, cancel, videos):
+        if cancel.is_set():
+            return
+        for v in videos:
+            entry_text = self.history_entry_text(v)
+            if entry_text not in self.history_entries:
+                self.history_entries.add(entry_text)
+                self.history_list.insert(tk.END, entry_text)
+
+    def set_history_thumbnails(self, cancel, entries):
+        if cancel.is_set():
+            return
+        self.history_ids.update(entries)
+
+        # Item selecionado antes da thumbnail chegar: mostra agora
+        selection = self.history_list.curselection()
+        if selection and self.history_list.get(selection[0]) in entries:
+            entry_text = self.history_list.get(selection[0])
+            video_id = entries[entry_text]
+            self.show_preview(entry_text, lambda: self.load_history_thumbnail(video_id))
+
+    def load_history_thumbnail(self, video_id):
+        """(thread de render) Thumbnail do histórico: da memória ou, se não estiver lá, do cache em disco"""
+        img = self.thumbnails.get(video_id)
+        if img is not None:
+            return img
+
+        img_data = self.thumb_cache.get(video_id, HISTORY_THUMB_WIDTH)
+        if img_data is None:
+            return None
+        try:
+            img = Image.open(io.BytesIO(img_data))
+            img.load()
         except Exception as e:
-            print("Erro ao buscar histórico do servidor:", e)
+            print(f"Erro ao carregar thumbnail de {video_id}: {e}")
+            return None
+        # Já vem comprimida (JPEG do servidor): guarda os bytes como estão
+        self.thumbnails.put_encoded(video_id, img_data)
+        return img
+
+    def report_memory(self):
+        """Mostra na barra de informações quanto as thumbnails e os previews ocupam em memória"""
+        self.memory_label.config(
+            text=f"Memória: {len(self.thumbnails)} thumbnails ({self.thumbnails.nbytes / 1024 / 1024:.1f} MB), "
+                 f"previews {self.render_cache_bytes / 1024 / 1024:.1f} MB")
+        self.root.after(MEMORY_REPORT_MS, self.report_memory)
 
 
 if __name__ == "__main__":
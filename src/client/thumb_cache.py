@@ -0,0 +1,126 @@
+# client/thumb_cache.py
+# Cache em disco das thumbnails do histórico: um SQLite com os bytes da imagem (JPEG, como
+# vieram do servidor), guardados por (id do vídeo, largura) junto com o ETag do servidor.
+# Na abertura seguinte o cliente manda os ETags que já tem para /api/thumbs e só baixa o
+# que mudou. O total é limitado a MAX_BYTES; ao passar disso saem os menos usados (LRU).
+import os
+import sys
+import time
+import sqlite3
+import threading
+import contextlib
+
+# Tamanho máximo do cache em disco, em MB (VIDEO_CLIENT_CACHE_MB)
+MAX_BYTES = int(os.environ.get("VIDEO_CLIENT_CACHE_MB", 200)) * 1024 * 1024
+
+def default_path():
+    """thumbs.db na pasta de cache do usuário (LOCALAPPDATA no Windows, XDG_CACHE_HOME ou ~/.cache)."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "video-client", "thumbs.db")
+
+class ThumbnailDiskCache:
+    """Usado pela thread do Tk e pelas threads de fundo: uma conexão só, protegida por lock."""
+
+    def __init__(self, path=None, max_bytes=MAX_BYTES):
+        self.path = path or default_path()
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS thumbs (
+                video_id TEXT,
+                width INTEGER,
+                etag TEXT,
+                data BLOB,
+                size INTEGER,
+                last_used REAL,
+                PRIMARY KEY (video_id, width)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_thumbs_last_used ON thumbs (last_used)")
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """BEGIN/COMMIT, com ROLLBACK se der erro (a conexão não fica presa numa transação aberta).
+        Quem chama já segura self.lock."""
+        self.conn.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def etags(self, video_ids, width):
+        """{id: etag} das thumbnails já guardadas, para a revalidação em /api/thumbs."""
+        found = {}
+        with self.lock:
+            # Em lotes: o SQLite limita o número de parâmetros por comando
+            for start in range(0, len(video_ids), 500):
+                batch = video_ids[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT video_id, etag FROM thumbs WHERE width = ? AND video_id IN ({','.join('?' * len(batch))})",
+                    (width, *batch))
+                found.update(rows)
+        return found
+
+    def get(self, video_id, width):
+        """Bytes da imagem, ou None. Marca a entrada como usada agora."""
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM thumbs WHERE video_id = ? AND width = ?",
+                                    (video_id, width)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE thumbs SET last_used = ? WHERE video_id = ? AND width = ?",
+                              (time.time(), video_id, width))
+        return row[0]
+
+    def put_many(self, width, thumbs):
+        """Grava [(id, etag, bytes)] e aplica o limite de tamanho."""
+        now = time.time()
+        with self.lock:
+            with self._transaction():
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO thumbs (video_id, width, etag, data, size, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(video_id, width, etag, data, len(data), now) for video_id, etag, data in thumbs])
+            self._evict()
+
+    def touch(self, video_ids, width):
+        """Marca como usadas as entradas revalidadas pelo servidor (not_modified)."""
+        now = time.time()
+        with self.lock, self._transaction():
+            self.conn.executemany("UPDATE thumbs SET last_used = ? WHERE video_id = ? AND width = ?",
+                                  [(now, video_id, width) for video_id in video_ids])
+
+    def delete(self, video_ids, width):
+        """Remove as entradas que o servidor não tem mais (missing)."""
+        with self.lock:
+            self.conn.executemany("DELETE FROM thumbs WHERE video_id = ? AND width = ?",
+                                  [(video_id, width) for video_id in video_ids])
+
+    def total_bytes(self):
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM thumbs").fetchone()[0]
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM thumbs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Dos menos usados para os mais usados, até caber no limite
+        doomed = []
+        for video_id, width, size in self.conn.execute("SELECT video_id, width, size FROM thumbs ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((video_id, width))
+            total -= size
+        self.conn.executemany("DELETE FROM thumbs WHERE video_id = ? AND width = ?", doomed)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
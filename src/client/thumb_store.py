@@ -0,0 +1,72 @@
+# client/thumb_store.py
+# Thumbnails em memória do cliente, compactas: cada imagem é reduzida para caber em
+# PREVIEW_SIZE e guardada como JPEG; só é decodificada quando vai para o preview (e aí
+# o render_cache do app guarda a versão já redimensionada). O total é limitado a
+# MAX_BYTES, descartando as menos usadas (LRU).
+import io
+import os
+import threading
+import collections
+
+from PIL import Image
+
+# Maior tamanho guardado: o preview não passa disso na maioria das telas
+PREVIEW_SIZE = (1280, 720)
+JPEG_QUALITY = 85
+# Memória máxima das thumbnails comprimidas, em MB (VIDEO_CLIENT_THUMBS_MB)
+MAX_BYTES = int(os.environ.get("VIDEO_CLIENT_THUMBS_MB", 32)) * 1024 * 1024
+
+class ThumbnailStore:
+    """Usado pela thread do Tk (put) e pela thread de render (get): acesso protegido por lock."""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.items = collections.OrderedDict()
+        self.nbytes = 0
+        self.lock = threading.Lock()
+
+    def put(self, key, img):
+        """Reduz, comprime e guarda a imagem (PIL); a original pode ser descartada depois."""
+        img = img.copy() if img.size[0] > PREVIEW_SIZE[0] or img.size[1] > PREVIEW_SIZE[1] else img
+        img.thumbnail(PREVIEW_SIZE, Image.Resampling.LANCZOS)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        buffer = io.BytesIO()
+        img.save(buffer, "JPEG", quality=JPEG_QUALITY)
+        self.put_encoded(key, buffer.getvalue())
+
+    def put_encoded(self, key, data):
+        """Guarda uma imagem já comprimida (ex.: JPEG vindo do servidor)."""
+        with self.lock:
+            old = self.items.pop(key, None)
+            if old is not None:
+                self.nbytes -= len(old)
+            self.items[key] = data
+            self.nbytes += len(data)
+            while self.nbytes > self.max_bytes and len(self.items) > 1:
+                _, evicted = self.items.popitem(last=False)
+                self.nbytes -= len(evicted)
+
+    def get(self, key):
+        """Imagem decodificada (PIL), ou None se não estiver (ou tiver sido descartada)."""
+        with self.lock:
+            data = self.items.get(key)
+            if data is None:
+                return None
+            self.items.move_to_end(key)
+        img = Image.open(io.BytesIO(data))
+        img.load()
+        return img
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.items
+
+    def __len__(self):
+        with self.lock:
+            return len(self.items)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+            self.nbytes = 0
@@ -0,0 +1,240 @@
+# database/db.py
+# Camada de acesso ao SQLite usada pelo servidor, pela fila de jobs e pelos workers.
+#
+# - Conexões reaproveitadas: cada chamada pega uma conexão livre do pool e devolve no
+#   final, então uma thread nunca divide conexão com outra e nada é reaberto por requisição.
+# - WAL: leitores não bloqueiam o escritor (workers gravando enquanto o Flask lê).
+# - Statements preparados: o sqlite3 guarda por conexão os últimos CACHED_STATEMENTS
+#   comandos; como as conexões vivem no pool, as consultas frequentes (id -> caminho,
+#   página da galeria, status de job) não são recompiladas.
+# - Migrações versionadas por PRAGMA user_version (ver MIGRATIONS).
+import os
+import queue
+import sqlite3
+import threading
+import contextlib
+
+# Arquivo do banco (VIDEO_DB_PATH); por padrão, videos.db ao lado deste módulo
+DB_PATH = os.environ.get("VIDEO_DB_PATH") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "videos.db")
+
+# Conexões livres mantidas no pool (as excedentes são fechadas ao devolver)
+POOL_SIZE = int(os.environ.get("VIDEO_DB_POOL", 8))
+# Cache de páginas por conexão, em KB (VIDEO_DB_CACHE_KB)
+CACHE_KB = int(os.environ.get("VIDEO_DB_CACHE_KB", 16384))
+CACHED_STATEMENTS = 256
+BUSY_TIMEOUT = 30
+
+_pool = queue.LifoQueue()
+_pool_lock = threading.Lock()
+_pool_owner = (os.getpid(), DB_PATH)
+
+def configure(path):
+    """Troca o arquivo do banco (benchmarks/ferramentas); as conexões livres são fechadas."""
+    global DB_PATH
+    DB_PATH = path
+    _reset_pool()
+
+def _reset_pool():
+    global _pool, _pool_owner
+    with _pool_lock:
+        old_pool, _pool = _pool, queue.LifoQueue()
+        inherited = _pool_owner[0] != os.getpid()
+        _pool_owner = (os.getpid(), DB_PATH)
+    # Conexões herdadas de outro processo não podem ser usadas nem fechadas aqui
+    while not inherited and not old_pool.empty():
+        old_pool.get_nowait().close()
+
+def _open():
+    # isolation_level=None: cada comando é sua própria transação; as compostas usam transaction()
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT, isolation_level=None,
+                           check_same_thread=False, cached_statements=CACHED_STATEMENTS)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    # Em WAL, NORMAL só perde as últimas transações numa queda de energia, nunca corrompe
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_KB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+@contextlib.contextmanager
+def connect():
+    """Empresta uma conexão do pool pelo tempo do bloco `with`."""
+    # Processo filho (fork) ou banco trocado: o pool herdado não vale aqui
+    if _pool_owner != (os.getpid(), DB_PATH):
+        _reset_pool()
+    pool = _pool
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _open()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        if pool is _pool and pool.qsize() < POOL_SIZE:
+            pool.put(conn)
+        else:
+            conn.close()
+
+@contextlib.contextmanager
+def transaction():
+    """Transação com lock de escrita desde o início (BEGIN IMMEDIATE); rollback se der erro."""
+    with connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+def query(sql, params=()):
+    """Lista de sqlite3.Row (acessível por índice ou nome de coluna)."""
+    with connect() as conn:
+        return conn.execute(sql, params).fetchall()
+
+def query_one(sql, params=()):
+    with connect() as conn:
+        return conn.execute(sql, params).fetchone()
+
+def execute(sql, params=()):
+    """Executa um comando de escrita e retorna o número de linhas afetadas."""
+    with connect() as conn:
+        return conn.execute(sql, params).rowcount
+
+def executemany(sql, seq_of_params):
+    with transaction() as conn:
+        return conn.executemany(sql, seq_of_params).rowcount
+
+# --- Migrações ---
+
+def _add_column_if_missing(conn, table, column, column_type):
+    columns = [row["name"] for row in conn.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+def _migration_1(conn):
+    """Esquema base. Idempotente: bancos antigos já podem ter parte dele (init_db de antes)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS videos (
+            id TEXT PRIMARY KEY,
+            original_name TEXT,
+            original_ext TEXT,
+            mime_type TEXT,
+            size_bytes INTEGER,
+            duration_sec REAL,
+            fps REAL,
+            width INTEGER,
+            height INTEGER,
+            filter TEXT,
+            created_at TEXT,
+            path_original TEXT,
+            path_processed TEXT,
+            cache_key TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            video_id TEXT,
+            status TEXT,
+            filter TEXT,
+            original_name TEXT,
+            input_path TEXT,
+            error TEXT,
+            created_at TEXT,
+            started_at TEXT,
+            finished_at TEXT,
+            input_size INTEGER,
+            input_checksum TEXT
+        )
+    """)
+    # Resultados reaproveitáveis: checksum do original + cadeia de filtros -> saída já gerada
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS result_cache (
+            cache_key TEXT PRIMARY KEY,
+            video_id TEXT,
+            path_processed TEXT,
+            path_thumb TEXT,
+            video_info TEXT,
+            created_at TEXT,
+            hits INTEGER DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER DEFAULT 0
+        )
+    """)
+    _add_column_if_missing(conn, "jobs", "input_size", "INTEGER")
+    _add_column_if_missing(conn, "jobs", "input_checksum", "TEXT")
+    _add_column_if_missing(conn, "videos", "cache_key", "TEXT")
+
+    # Versão da tabela videos: muda a cada escrita, de qualquer processo (cache da galeria, ETag)
+    conn.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('videos_version', 0)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS videos_version_{event.lower()} AFTER {event} ON videos
+            BEGIN
+                UPDATE counters SET value = value + 1 WHERE name = 'videos_version';
+            END
+        """)
+
+def _migration_2(conn):
+    """Índices das consultas frequentes e checksum do processado na tabela videos."""
+    _add_column_if_missing(conn, "videos", "checksum", "TEXT")
+    # Paginação por (created_at, id); cobrem os campos padrão de /api/videos e da galeria
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_page ON videos (created_at, id, filter, original_name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_filter_page ON videos (filter, created_at, id, original_name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_checksum ON videos (checksum)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_cache_key ON videos (cache_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+
+def _migration_3(conn):
+    """Progresso do processamento (0 a 1) gravado pelo worker."""
+    _add_column_if_missing(conn, "jobs", "progress", "REAL")
+
+def _migration_4(conn):
+    """Sessões de upload retomável e os blocos já confirmados de cada uma (storage.uploads)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+            id TEXT PRIMARY KEY,
+            original_name TEXT,
+            filter TEXT,
+            size INTEGER,
+            received INTEGER DEFAULT 0,
+            path TEXT,
+            created_at TEXT,
+            updated_at TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS upload_chunks (
+            session_id TEXT,
+            start INTEGER,
+            length INTEGER,
+            md5 TEXT,
+            PRIMARY KEY (session_id, start)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_upload_sessions_updated ON upload_sessions (updated_at)")
+
+# Cada posição é uma versão (user_version = índice + 1); só acrescentar no final
+MIGRATIONS = [_migration_1, _migration_2, _migration_3, _migration_4]
+
+def schema_version():
+    return query_one("PRAGMA user_version")[0]
+
+def migrate():
+    """Aplica as migrações pendentes numa transação só e retorna a versão final.
+
+    BEGIN IMMEDIATE serializa processos que sobem juntos: o segundo lê a versão já atualizada.
+    """
+    with transaction() as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+    return schema_version()
@@ -0,0 +1,29 @@
+# filters/edges.py
+import cv2
+import numpy as np
+
+NAME = "edges"
+DESCRIPTION = "Detecção de Bordas"
+ORDER = 1
+# A saída tem um único canal (ver apply_native)
+MONO = True
+
+def apply(frame):
+    edges = cv2.Canny(frame, 100, 200)
+    return cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
+
+def apply_native(frame):
+    return cv2.Canny(frame, 100, 200)
+
+def apply_batch(frames, out=None):
+    n, h, w = frames.shape[:3]
+    if out is None:
+        out = np.empty_like(frames)
+    # Canny depende da vizinhança, então roda frame a frame (sem empilhar as bordas)
+    # Com saída (N, H, W) de um canal, escreve direto nela sem expandir para BGR
+    edges = out if out.ndim == 3 else np.empty((n, h, w), np.uint8)
+    for i in range(n):
+        cv2.Canny(frames[i], 100, 200, edges=edges[i])
+    if edges is not out:
+        cv2.cvtColor(edges.reshape(n * h, w), cv2.COLOR_GRAY2BGR, dst=out.reshape(n * h, w, 3))
+    return out
@@ -0,0 +1,31 @@
+# filters/grayscale.py
+import cv2
+import numpy as np
+
+NAME = "gray"
+DESCRIPTION = "Escala de Cinza"
+ORDER = 0
+# A saída tem um único canal (ver apply_native)
+MONO = True
+
+def apply(frame):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+def apply_native(frame):
+    if frame.ndim == 2:
+        return frame
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+def apply_batch(frames, out=None):
+    n, h, w = frames.shape[:3]
+    if out is None:
+        out = np.empty_like(frames)
+    # Conversão pixel a pixel: a pilha (N, H, W, 3) é tratada como uma única imagem (N*H, W)
+    if out.ndim == 3:
+        # Saída (N, H, W) de um canal: sem expandir de volta para BGR
+        cv2.cvtColor(frames.reshape(n * h, w, 3), cv2.COLOR_BGR2GRAY, dst=out.reshape(n * h, w))
+        return out
+    gray = cv2.cvtColor(frames.reshape(n * h, w, 3), cv2.COLOR_BGR2GRAY)
+    cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR, dst=out.reshape(n * h, w, 3))
+    return out
@@ -0,0 +1,27 @@
+# filters/pixelate.py
+import cv2
+import numpy as np
+
+NAME = "pixel"
+DESCRIPTION = "Pixelização"
+ORDER = 2
+# Mantém o número de canais da entrada
+MONO = False
+
+def apply(frame, size=(64, 64)):
+    h, w = frame.shape[:2]
+    small = cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+    return cv2.resize(small, (w, h), interpolation=cv2.INTER_NEAREST)
+
+def apply_native(frame):
+    return apply(frame)
+
+def apply_batch(frames, out=None, size=(64, 64)):
+    n, h, w, c = frames.shape
+    if out is None:
+        out = np.empty_like(frames)
+    small = np.empty((n, size[1], size[0], c), np.uint8)
+    for i in range(n):
+        cv2.resize(frames[i], size, dst=small[i], interpolation=cv2.INTER_LINEAR)
+        cv2.resize(small[i], (w, h), dst=out[i], interpolation=cv2.INTER_NEAREST)
+    return out
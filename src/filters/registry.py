@@ -0,0 +1,86 @@
+# filters/registry.py
+import os
+import pkgutil
+import importlib
+import functools
+
+import cv2
+
+# Separador de filtros encadeados, ex.: "pixel+gray"
+CHAIN_SEPARATOR = "+"
+
+def _discover():
+    """Importa os módulos desta pasta que definem NAME e apply_native."""
+    found = {}
+    for module_info in pkgutil.iter_modules([os.path.dirname(__file__)]):
+        if module_info.name == "registry":
+            continue
+        module = importlib.import_module(f"filters.{module_info.name}")
+        if hasattr(module, "NAME") and hasattr(module, "apply_native"):
+            found[module.NAME] = module
+    return dict(sorted(found.items(), key=lambda item: getattr(item[1], "ORDER", 100)))
+
+FILTERS = _discover()
+
+def available():
+    """Lista de filtros no formato da rota /filters."""
+    return [{"name": name, "description": module.DESCRIPTION} for name, module in FILTERS.items()]
+
+def parse(spec):
+    """Separa uma cadeia como "pixel+gray" em nomes, validando cada um. Levanta ValueError."""
+    names = [name.strip() for name in spec.split(CHAIN_SEPARATOR)]
+    unknown = [name for name in names if name not in FILTERS]
+    if unknown:
+        raise ValueError(f"Filtro desconhecido: {', '.join(unknown)}")
+    return names
+
+def normalize(spec):
+    """Forma canônica de uma cadeia (" pixel + gray" -> "pixel+gray"). Levanta ValueError."""
+    return CHAIN_SEPARATOR.join(parse(spec))
+
+def describe(spec):
+    """Descrição legível de uma cadeia, ex.: "Pixelização + Escala de Cinza"."""
+    names = spec.split(CHAIN_SEPARATOR)
+    return " + ".join(FILTERS[name].DESCRIPTION if name in FILTERS else name for name in names)
+
+class FilterChain:
+    """Cadeia de filtros compilada em uma única função por frame.
+
+    Os passos intermediários trabalham no número de canais que cada filtro produz
+    (um canal depois de gray/edges) e a conversão para BGR acontece uma vez, no final.
+    """
+
+    def __init__(self, names):
+        self.names = names
+        self.modules = [FILTERS[name] for name in names]
+        self.steps = [module.apply_native for module in self.modules]
+        # Saída monocromática se algum passo reduz para um canal (nenhum filtro volta a colorir)
+        self.mono = any(module.MONO for module in self.modules)
+
+    def apply_native(self, frame):
+        for step in self.steps:
+            frame = step(frame)
+        return frame
+
+    def apply(self, frame):
+        frame = self.apply_native(frame)
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        return frame
+
+    def apply_batch(self, frames, out):
+        """Filtra a pilha (N, H, W, 3). Se `out` for (N, H, W), a saída fica em um canal (só se `mono`)."""
+        if len(self.modules) == 1:
+            return self.modules[0].apply_batch(frames, out)
+        for i in range(len(frames)):
+            frame = self.apply_native(frames[i])
+            if frame.ndim == 2 and out.ndim == 4:
+                cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR, dst=out[i])
+            else:
+                out[i] = frame
+        return out
+
+@functools.lru_cache(maxsize=64)
+def compile_chain(spec):
+    """Compila a especificação de filtros em uma FilterChain. Levanta ValueError se inválida."""
+    return FilterChain(parse(spec))
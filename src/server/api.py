@@ -1,91 +1,118 @@
 import os
+import sys
+import json
 import uuid
-import datetime
-import cv2
-from flask import Flask, request, render_template_string, send_from_directory, redirect, url_for, jsonify
+import logging
+import base64
+import struct
+import hashlib
+import functools
+import contextlib
+import mimetypes
+import multiprocessing
+from urllib.parse import quote
+from flask import Flask, Request, request, render_template_string, send_file, redirect, url_for, jsonify
+from werkzeug.utils import secure_filename
+
+# A camada de banco (src/database) e os filtros (src/filters, usados também pelo cliente)
+# ficam fora de src/server. Os workers (spawn) herdam este sys.path.
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
 
 # imports locais
-from storage import manager, paths
-from filters import grayscale, edges, pixelate
+from storage import manager, paths, ingest, cache, resolver, uploads
+from database import db
+from jobs import queue as job_queue
+from filters import registry
+from processing import thumbnails
 
 manager.init_db()
 
-app = Flask(__name__)
+# Também vale nos workers: no spawn eles reimportam este módulo
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s: %(message)s")
 
-def process_video(input_path, output_path, filter_type="gray"):
-    video_capture = cv2.VideoCapture(input_path)
-    video_codec = cv2.VideoWriter_fourcc(*"mp4v")
-    video_fps = video_capture.get(cv2.CAP_PROP_FPS)
-    frame_width = int(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
-    frame_height = int(video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-    video_writer = cv2.VideoWriter(output_path, video_codec, video_fps, (frame_width, frame_height), isColor=True)
-
-    while True:
-        frame_read_success, frame = video_capture.read()
-        if not frame_read_success:
-            break
-
-        if filter_type == "gray":
-            frame = grayscale.apply(frame)
-        elif filter_type == "edges":
-            frame = edges.apply(frame)
-        elif filter_type == "pixel":
-            frame = pixelate.apply(frame)
-
-        video_writer.write(frame)
-
-    video_capture.release()
-    video_writer.release()
-
-def generate_thumbnail(video_path, thumbnail_path):
-    video_capture = cv2.VideoCapture(video_path)
-    frame_read_success, frame = video_capture.read()
-    if frame_read_success:
-        frame = cv2.resize(frame, (160, 90))
-        cv2.imwrite(thumbnail_path, frame)
-    video_capture.release()
-
-# Função para obter duração do vídeo
-def get_video_duration(video_path):
-    """Retorna a duração do vídeo em formato MM:SS"""
-    try:
-        video_capture = cv2.VideoCapture(video_path)
-        fps = video_capture.get(cv2.CAP_PROP_FPS)
-        frame_count = video_capture.get(cv2.CAP_PROP_FRAME_COUNT)
-        video_capture.release()
-        
-        if fps > 0:
-            duration_seconds = int(frame_count / fps)
-            minutes = duration_seconds // 60
-            seconds = duration_seconds % 60
-            return f"{minutes:02d}:{seconds:02d}"
-        return "00:00"
-    except:
-        return "00:00"
+# Tamanho máximo de um upload, em MB (VIDEO_MAX_UPLOAD_MB)
+MAX_UPLOAD_BYTES = int(os.environ.get("VIDEO_MAX_UPLOAD_MB", 4096)) * 1024 * 1024
+
+class UploadRequest(Request):
+    """Grava os arquivos de um multipart direto em paths.INCOMING, calculando o MD5 durante o parse.
+
+    Cada arquivo criado fica em `incoming_files` até ser entregue a um job; os que
+    sobrarem são apagados no fim da requisição (ver discard_incoming_files).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.incoming_files = []
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # O uuid no nome evita colisão entre uploads simultâneos do mesmo arquivo
+        safe_name = secure_filename(filename or "") or "upload"
+        stream = ingest.HashingWriter(os.path.join(paths.INCOMING, f"{uuid.uuid4()}_{safe_name}"))
+        self.incoming_files.append(stream)
+        return stream
+
+app = Flask(__name__)
+app.request_class = UploadRequest
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
+
+@app.teardown_request
+def discard_incoming_files(exc):
+    """Apaga os arquivos do multipart que não viraram job: campo faltando, partes extras,
+    erro de validação, 413 no meio do parse ou exceção antes do enqueue."""
+    for stream in request.incoming_files:
+        stream.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(stream.path)
+
+# Entrega de vídeos/thumbs: "" (o próprio Flask), "x-sendfile" (Apache/lighttpd) ou "x-accel" (nginx)
+SENDFILE_MODE = os.environ.get("VIDEO_SENDFILE", "").lower()
+# Prefixo da location internal do nginx para o modo x-accel
+ACCEL_PREFIX = os.environ.get("VIDEO_ACCEL_PREFIX", "/media-internal/")
+MEDIA_MAX_AGE = 365 * 24 * 3600
+app.config["USE_X_SENDFILE"] = SENDFILE_MODE == "x-sendfile"
+# Tipos da sprite sheet que nem toda instalação do Python conhece
+mimetypes.add_type("text/vtt", ".vtt")
+mimetypes.add_type("image/webp", ".webp")
+
+# Vídeos por página da galeria
+GALLERY_PAGE_SIZE = int(os.environ.get("VIDEO_GALLERY_PAGE_SIZE", 48))
+
+def format_duration(duration_sec):
+    """Formata a duração salva no banco como MM:SS."""
+    duration_seconds = int(duration_sec or 0)
+    minutes = duration_seconds // 60
+    seconds = duration_seconds % 60
+    return f"{minutes:02d}:{seconds:02d}"
+
+@functools.lru_cache(maxsize=None)
+def compiled_template(source):
+    """Compila o template uma vez só (render_template_string recompila a cada chamada)."""
+    return app.jinja_env.from_string(source)
 
 # --- Rotas ---
 @app.route("/", methods=["GET"])
 def index():
-    with manager.sqlite3.connect(manager.DB_PATH) as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT id, original_name, filter, created_at FROM videos ORDER BY created_at DESC")
-        rows = cur.fetchall()
-    
-    # Adicionar duração aos vídeos
-    videos_with_duration = []
-    for row in rows:
-        video_id, original_name, filter_type, created_at = row
-        
-        # Buscar o caminho do vídeo
-        video_path = None
-        for root_dir, sub_dirs, files in os.walk(paths.VIDEOS):
-            if video_id in root_dir and "video.mp4" in files:
-                video_path = os.path.join(root_dir, "video.mp4")
-                break
-        
-        duration = get_video_duration(video_path) if video_path else "00:00"
-        videos_with_duration.append((video_id, original_name, filter_type, created_at, duration))
+    page = max(request.args.get("page", 1, type=int), 1)
+    # A página só muda quando a tabela videos muda (contador mantido por trigger no banco)
+    return render_gallery(manager.videos_version(), page)
+
+@functools.lru_cache(maxsize=64)
+def render_gallery(version, page):
+    """Renderiza uma página da galeria só com o que já está no banco; cache por (versão, página)."""
+    filter_counts = dict(db.query("SELECT filter, COUNT(*) FROM videos GROUP BY filter"))
+    rows = db.query("""
+        SELECT id, original_name, filter, created_at, duration_sec FROM videos
+        ORDER BY created_at DESC LIMIT ? OFFSET ?
+    """, (GALLERY_PAGE_SIZE, (page - 1) * GALLERY_PAGE_SIZE))
+
+    total = sum(filter_counts.values())
+    page_count = max((total + GALLERY_PAGE_SIZE - 1) // GALLERY_PAGE_SIZE, 1)
+    videos_with_duration = [
+        (video_id, original_name, filter_type, created_at, format_duration(duration_sec))
+        for video_id, original_name, filter_type, created_at, duration_sec in rows
+    ]
     
     template = """
     <!DOCTYPE html>
@@ -176,6 +203,22 @@ def index():
                 gap: 25px;
                 margin-top: 30px;
             }
+
+            .pagination {
+                display: flex;
+                justify-content: center;
+                align-items: center;
+                gap: 20px;
+                margin-top: 30px;
+            }
+
+            .pagination a {
+                color: white;
+                border: 1px solid white;
+                border-radius: 8px;
+                padding: 6px 14px;
+                text-decoration: none;
+            }
             
             .video-card {
                 background: transparent;
@@ -300,31 +343,25 @@ def index():
                 <h1>Galeria de Vídeos</h1>
             </header>
             
-            {% if videos_with_duration %}
+            {% if total %}
                 <div class="stats-section">
                     <div class="stat-card">
-                        <span class="stat-number">{{ videos_with_duration|length }}</span>
+                        <span class="stat-number">{{ total }}</span>
                         <div class="stat-label">Total de Vídeos</div>
                     </div>
+                    {% for f in filters %}
                     <div class="stat-card">
-                        <span class="stat-number">{{ videos_with_duration|selectattr('2', 'equalto', 'gray')|list|length }}</span>
-                        <div class="stat-label">Escala de Cinza</div>
-                    </div>
-                    <div class="stat-card">
-                        <span class="stat-number">{{ videos_with_duration|selectattr('2', 'equalto', 'edges')|list|length }}</span>
-                        <div class="stat-label">Detecção de Bordas</div>
-                    </div>
-                    <div class="stat-card">
-                        <span class="stat-number">{{ videos_with_duration|selectattr('2', 'equalto', 'pixel')|list|length }}</span>
-                        <div class="stat-label">Pixelizados</div>
+                        <span class="stat-number">{{ filter_counts.get(f.name, 0) }}</span>
+                        <div class="stat-label">{{ f.description }}</div>
                     </div>
+                    {% endfor %}
                 </div>
                 
                 <div class="videos-grid">
                     {% for id, original_name, filter, created_at, duration in videos_with_duration %}
                         <div class="video-card">
                             <a href="{{ url_for('serve_video', video_id=id) }}" style="text-decoration: none;">
-                                <img src="{{ url_for('serve_thumb', video_id=id) }}" 
+                                <img src="{{ url_for('serve_thumb', video_id=id, w=320) }}" 
                                     alt="Thumbnail do vídeo {{ original_name }}"
                                     class="video-thumbnail"
                                     onerror="this.src='data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMTYwIiBoZWlnaHQ9IjkwIiB2aWV3Qm94PSIwIDAgMTYwIDkwIiBmaWxsPSJub25lIiB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciPgo8cmVjdCB3aWR0aD0iMTYwIiBoZWlnaHQ9IjkwIiBmaWxsPSIjZjVmNWY1Ii8+Cjx0ZXh0IHg9IjgwIiB5PSI0NSIgdGV4dC1hbmNob3I9Im1pZGRsZSIgZHk9Ii4zZW0iIGZpbGw9IiM5OTkiIGZvbnQtZmFtaWx5PSJzYW5zLXNlcmlmIiBmb250LXNpemU9IjEyIj5TZW0gSW1hZ2VtPC90ZXh0Pgo8L3N2Zz4K'">
@@ -332,13 +369,7 @@ def index():
                             <div class="video-info">
                                 <div class="video-name">{{ original_name }}</div>
                                 <span class="filter-badge">
-                                    {% if filter == 'gray' %}
-                                        Escala de Cinza
-                                    {% elif filter == 'edges' %}
-                                        Detecção de Bordas
-                                    {% elif filter == 'pixel' %}
-                                        Pixelização
-                                    {% endif %}
+                                    {{ describe_filter(filter) }}
                                 </span>
                                 <span class="duration-badge">
                                     <i class="fas fa-clock"></i> {{ duration }}
@@ -354,6 +385,18 @@ def index():
                         </div>
                     {% endfor %}
                 </div>
+
+                {% if page_count > 1 %}
+                <div class="pagination">
+                    {% if page > 1 %}
+                        <a href="{{ url_for('index', page=page - 1) }}">&larr; Anterior</a>
+                    {% endif %}
+                    <span>Página {{ page }} de {{ page_count }}</span>
+                    {% if page < page_count %}
+                        <a href="{{ url_for('index', page=page + 1) }}">Próxima &rarr;</a>
+                    {% endif %}
+                </div>
+                {% endif %}
             {% else %}
                 <div class="no-videos">
                     <h2>📂 Nenhum vídeo encontrado</h2>
@@ -364,97 +407,325 @@ def index():
     </body>
     </html>
     """
-    return render_template_string(template, videos_with_duration=videos_with_duration)
+    return compiled_template(template).render(videos_with_duration=videos_with_duration,
+                                              total=total, filter_counts=filter_counts, page=page, page_count=page_count,
+                                              filters=registry.available(), describe_filter=registry.describe)
 
 @app.route("/upload", methods=["POST"])
 def upload():
+    if request.mimetype == "application/octet-stream":
+        return upload_stream()
+
     uploaded_file = request.files["video"]
     selected_filter = request.form.get("filter", "gray")
     if not uploaded_file:
         return "Nenhum arquivo enviado", 400
+    try:
+        selected_filter = registry.normalize(selected_filter)
+    except ValueError as e:
+        return str(e), 400
 
-    temp_file_path = os.path.join(paths.INCOMING, uploaded_file.filename)
-    uploaded_file.save(temp_file_path)
+    # O arquivo já foi gravado em paths.INCOMING durante o parse (ver UploadRequest)
+    upload_stream_file = uploaded_file.stream
+    upload_stream_file.close()
 
+    # O processamento roda no pool de workers; o cliente acompanha pelo job
     video_uuid = str(uuid.uuid4())
-    today_date = datetime.date.today()
-    output_directory = os.path.join(paths.VIDEOS, today_date.strftime("%Y"), today_date.strftime("%m"), today_date.strftime("%d"), video_uuid)
-    os.makedirs(output_directory, exist_ok=True)
-
-    output_video_path = os.path.join(output_directory, "video.mp4")
-    process_video(temp_file_path, output_video_path, selected_filter)
-
-    # thumbnail
-    thumbnail_directory = os.path.join(output_directory, "thumbs")
-    os.makedirs(thumbnail_directory, exist_ok=True)
-    thumbnail_file_path = os.path.join(thumbnail_directory, "thumb.jpg")
-    generate_thumbnail(output_video_path, thumbnail_file_path)
-
-    result = manager.save_meta_json(
-        video_uuid,
-        uploaded_file.filename,
-        selected_filter,
-        output_video_path,
-        thumbnail_file_path,
-        output_directory
-    )
-    
+    job_id = job_queue.enqueue(video_uuid, uploaded_file.filename, selected_filter, upload_stream_file.path,
+                               upload_stream_file.size, upload_stream_file.hexdigest())
+    # Agora o arquivo é do job: não entra na limpeza do fim da requisição
+    request.incoming_files.remove(upload_stream_file)
+    return job_response(job_id, video_uuid)
+
+def upload_stream():
+    """Upload com o corpo bruto (application/octet-stream); filtro, nome e tamanho vão na query string.
+
+    O corpo é gravado em blocos e o job é liberado logo no começo, então o
+    processamento acompanha a transferência.
+    """
+    selected_filter = request.args.get("filter", "gray")
+    original_name = request.args.get("filename", "video.mp4")
+    try:
+        selected_filter = registry.normalize(selected_filter)
+    except ValueError as e:
+        return str(e), 400
+
+    video_uuid = str(uuid.uuid4())
+    safe_name = secure_filename(original_name) or "upload"
+    temp_file_path = os.path.join(paths.INCOMING, f"{video_uuid}_{safe_name}")
+
+    # Sem Content-Length (transferência chunked), o cliente pode informar o tamanho em ?size=
+    expected_size = request.content_length or request.args.get("size", type=int)
 
-    # agora salvar no SQLite
-    with manager.sqlite3.connect(manager.DB_PATH) as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO videos (
-                id, original_name, original_ext, mime_type, size_bytes,
-                duration_sec, fps, width, height,
-                filter, created_at,
-                path_original, path_processed
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            result["id"],
-            result["original_name"],
-            result["original_ext"],
-            result["mime_type"],
-            result["size_bytes"],
-            result["duration_sec"],
-            result["fps"],
-            result["width"],
-            result["height"],
-            result["filter"],
-            result["created_at"],
-            result["path_original"],
-            result["path_processed"]
-        ))
-        conn.commit()
-
-    os.remove(temp_file_path)
+    job = {}
+    def start_job():
+        job["id"] = job_queue.enqueue(video_uuid, original_name, selected_filter, temp_file_path, expected_size)
+
+    try:
+        size, checksum = ingest.receive_stream(request.stream, temp_file_path, MAX_UPLOAD_BYTES, start_job)
+    except ingest.UploadTooLarge as e:
+        return str(e), 413
+
+    job_queue.set_input(job["id"], size, checksum)
+    return job_response(job["id"], video_uuid)
+
+@app.route("/uploads", methods=["POST"])
+def create_upload_session():
+    """Abre um upload retomável. Corpo: {"filename": ..., "filter": ..., "size": bytes}.
+
+    Protocolo: PUT /uploads/<id> com o cabeçalho Upload-Offset (e, opcional, X-Chunk-MD5
+    em hex) para cada bloco, em ordem; GET /uploads/<id> informa o offset confirmado para
+    retomar depois de uma queda; POST /uploads/<id>/finalize enfileira o processamento.
+    """
+    body = request.get_json(silent=True) or {}
+    size = body.get("size")
+    if not isinstance(size, int) or size <= 0:
+        return "Informe o tamanho do arquivo (size)", 400
+    if size > MAX_UPLOAD_BYTES:
+        return f"Upload maior que {MAX_UPLOAD_BYTES} bytes", 413
+    try:
+        selected_filter = registry.normalize(body.get("filter", "gray"))
+    except ValueError as e:
+        return str(e), 400
+
+    session = uploads.create(body.get("filename") or "video.mp4", selected_filter, size)
+    return upload_session_response(session), 201
+
+def upload_session_response(session, **extra):
+    response = jsonify({
+        "id": session["id"],
+        "offset": session["received"],
+        "size": session["size"],
+        "max_chunk_bytes": uploads.MAX_CHUNK_BYTES,
+        "upload_url": url_for("upload_session_status", session_id=session["id"], _external=True),
+        "finalize_url": url_for("finalize_upload_session", session_id=session["id"], _external=True),
+        **extra
+    })
+    response.headers["Upload-Offset"] = str(session["received"])
+    return response
+
+def offset_conflict(offset, message):
+    response = jsonify({"error": message, "offset": offset})
+    response.headers["Upload-Offset"] = str(offset)
+    return response, 409
+
+@app.route("/uploads/<session_id>")
+def upload_session_status(session_id):
+    session = uploads.get(session_id)
+    if not session:
+        return "Sessão de upload não encontrada", 404
+    return upload_session_response(session, chunks=uploads.chunks(session_id))
+
+@app.route("/uploads/<session_id>", methods=["PUT"])
+def upload_chunk(session_id):
+    offset = request.headers.get("Upload-Offset", type=int)
+    if offset is None:
+        return "Informe o cabeçalho Upload-Offset", 400
+    try:
+        new_offset = uploads.write_chunk(session_id, offset, request.stream, request.headers.get("X-Chunk-MD5"),
+                                         request.content_length)
+    except uploads.OffsetMismatch as e:
+        return offset_conflict(e.offset, "Offset diferente do confirmado pelo servidor")
+    except uploads.SessionBusy as e:
+        return str(e), 409
+    except (uploads.ChecksumMismatch, uploads.IncompleteChunk) as e:
+        return str(e), 400
+    except ingest.UploadTooLarge as e:
+        return str(e), 413
+    if new_offset is None:
+        return "Sessão de upload não encontrada", 404
+
+    response = jsonify({"offset": new_offset})
+    response.headers["Upload-Offset"] = str(new_offset)
+    return response
+
+@app.route("/uploads/<session_id>", methods=["DELETE"])
+def abort_upload_session(session_id):
+    try:
+        if not uploads.abort(session_id):
+            return "Sessão de upload não encontrada", 404
+    except uploads.SessionBusy as e:
+        return str(e), 409
+    return "", 204
+
+@app.route("/uploads/<session_id>/finalize", methods=["POST"])
+def finalize_upload_session(session_id):
+    try:
+        session = uploads.finalize(session_id)
+    except uploads.OffsetMismatch as e:
+        return offset_conflict(e.offset, "Upload incompleto")
+    except uploads.SessionBusy as e:
+        return str(e), 409
+    if session is None:
+        return "Sessão de upload não encontrada", 404
+
+    # Daqui em diante é o mesmo caminho do /upload
+    video_uuid = str(uuid.uuid4())
+    job_id = job_queue.enqueue(video_uuid, session["original_name"], session["filter"], session["path"], session["size"])
+    return job_response(job_id, video_uuid)
+
+def job_response(job_id, video_uuid):
+    return jsonify({
+        "job_id": job_id,
+        "id": video_uuid,
+        "status_url": url_for("job_status", job_id=job_id, _external=True),
+        "result_url": url_for("job_result", job_id=job_id, _external=True)
+    }), 202
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = job_queue.get_job(job_id)
+    if not job:
+        return "Job não encontrado", 404
+
+    return jsonify({
+        "id": job["id"],
+        "video_id": job["video_id"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "filter": job["filter"],
+        "original_name": job["original_name"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"]
+    })
+
+@app.route("/jobs/<job_id>/result")
+def job_result(job_id):
+    job = job_queue.get_job(job_id)
+    if not job:
+        return "Job não encontrado", 404
+    if job["status"] == "failed":
+        return jsonify({"id": job["id"], "status": job["status"], "error": job["error"]}), 500
+    if job["status"] != "done":
+        # Ainda na fila ou processando
+        return jsonify({"id": job["id"], "status": job["status"], "progress": job["progress"]}), 202
+
+    video_uuid = job["video_id"]
     return jsonify({
         "id": video_uuid,
         "video_url": url_for("serve_video", video_id=video_uuid, _external=True),
         "thumb_url": url_for("serve_thumb", video_id=video_uuid, _external=True)
     })
 
+def send_media(file_path):
+    """Entrega um arquivo de mídia com Range/206, ETag, Last-Modified e cache longo.
+
+    As URLs levam o UUID do vídeo e o conteúdo nunca muda, então o navegador pode
+    guardar para sempre (immutable). Com VIDEO_SENDFILE o servidor web na frente
+    do Flask lê o arquivo e os bytes não passam pelo Python.
+    """
+    if SENDFILE_MODE == "x-accel":
+        # nginx: location internal apontando para paths.MEDIA_ROOT (ver README)
+        relative = os.path.relpath(file_path, paths.MEDIA_ROOT).replace(os.sep, "/")
+        response = app.response_class(mimetype=mimetypes.guess_type(file_path)[0] or "application/octet-stream")
+        response.headers["X-Accel-Redirect"] = ACCEL_PREFIX.rstrip("/") + "/" + quote(relative)
+    else:
+        # Sem servidor na frente, o Werkzeug atende Range com seek: só os bytes pedidos são lidos
+        response = send_file(os.path.abspath(file_path), conditional=True, max_age=MEDIA_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.max_age = MEDIA_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
 @app.route("/videos/<video_id>")
 def serve_video(video_id):
-    for root_dir, sub_dirs, files in os.walk(paths.VIDEOS):
-        if video_id in root_dir and "video.mp4" in files:
-            return send_from_directory(root_dir, "video.mp4")
-    return "Vídeo não encontrado", 404
+    video_files = resolver.resolve(video_id)
+    if not video_files or not os.path.isfile(video_files["processed"]):
+        return "Vídeo não encontrado", 404
+    return send_media(video_files["processed"])
 
 @app.route("/thumbs/<video_id>")
 def serve_thumb(video_id):
-    for root_dir, sub_dirs, files in os.walk(paths.VIDEOS):
-        if video_id in root_dir and "thumbs" in sub_dirs:
-            return send_from_directory(os.path.join(root_dir, "thumbs"), "thumb.jpg")
+    """Thumbnail pré-computada mais próxima de ?w= (padrão: a menor); ?format=webp se gerada."""
+    video_files = resolver.resolve(video_id)
+    if not video_files:
+        return "Thumb não encontrada", 404
+
+    thumbs_dir = os.path.dirname(video_files["thumb"])
+    width = thumbnails.pick_width(request.args.get("w", thumbnails.THUMB_WIDTHS[0], type=int))
+    ext = "webp" if request.args.get("format") == "webp" else "jpg"
+    # Vídeos antigos só têm a thumb.jpg
+    for name in (thumbnails.thumb_filename(width, ext), thumbnails.thumb_filename(width), "thumb.jpg"):
+        if os.path.isfile(os.path.join(thumbs_dir, name)):
+            return send_media(os.path.join(thumbs_dir, name))
     return "Thumb não encontrada", 404
 
+@app.route("/thumbs/<video_id>/<name>")
+def serve_sprite(video_id, name):
+    """Sprite sheet de scrubbing (sprite.jpg) e seus índices (sprite.vtt, sprite.json)."""
+    video_files = resolver.resolve(video_id)
+    if name not in (thumbnails.SPRITE_IMAGE, thumbnails.SPRITE_VTT, thumbnails.SPRITE_INDEX) or not video_files:
+        return "Arquivo não encontrado", 404
+    sprite_path = os.path.join(os.path.dirname(video_files["thumb"]), name)
+    if not os.path.isfile(sprite_path):
+        return "Arquivo não encontrado", 404
+    return send_media(sprite_path)
+
+# Máximo de ids por chamada de /api/thumbs
+THUMBS_BATCH_MAX = 1000
+
+@app.route("/api/thumbs", methods=["POST"])
+def thumbs_batch():
+    """Várias thumbnails em uma resposta só. Corpo: {"ids": [...], "w": 160, "etags": {id: etag}}.
+
+    Resposta application/octet-stream: 4 bytes com o tamanho N do índice (uint32
+    big-endian), N bytes de índice JSON e as imagens concatenadas. O índice é
+    {"thumbs": [{"id", "offset", "length", "mimetype", "etag"}], "missing": [...],
+    "not_modified": [...]}, com os offsets contados a partir do fim do índice. Ids
+    cujo etag em "etags" ainda vale (cópia do cliente atualizada) vão só em "not_modified".
+    """
+    body = request.get_json(silent=True) or {}
+    ids = body.get("ids")
+    if not isinstance(ids, list):
+        return "Informe a lista de ids", 400
+    if len(ids) > THUMBS_BATCH_MAX:
+        return f"No máximo {THUMBS_BATCH_MAX} ids por chamada", 400
+    try:
+        width = thumbnails.pick_width(int(body.get("w", thumbnails.THUMB_WIDTHS[0])))
+    except (TypeError, ValueError):
+        return "Largura inválida", 400
+    known_etags = body.get("etags") or {}
+    if not isinstance(known_etags, dict):
+        return "etags deve ser um objeto {id: etag}", 400
+
+    index = {"thumbs": [], "missing": [], "not_modified": []}
+    chunks = []
+    offset = 0
+    for video_id in ids:
+        video_files = resolver.resolve(str(video_id))
+        thumb_path = None
+        if video_files:
+            thumbs_dir = os.path.dirname(video_files["thumb"])
+            for name in (thumbnails.thumb_filename(width), "thumb.jpg"):
+                if os.path.isfile(os.path.join(thumbs_dir, name)):
+                    thumb_path = os.path.join(thumbs_dir, name)
+                    break
+        if thumb_path is None:
+            index["missing"].append(video_id)
+            continue
+        # Validador barato, sem ler o arquivo: muda se a thumbnail for regravada
+        stat = os.stat(thumb_path)
+        etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        if known_etags.get(video_id) == etag:
+            index["not_modified"].append(video_id)
+            continue
+        with open(thumb_path, "rb") as f:
+            data = f.read()
+        index["thumbs"].append({"id": video_id, "offset": offset, "length": len(data), "mimetype": "image/jpeg",
+                                "etag": etag})
+        chunks.append(data)
+        offset += len(data)
+
+    header = json.dumps(index).encode()
+    return app.response_class(b"".join([struct.pack(">I", len(header)), header, *chunks]),
+                              mimetype="application/octet-stream")
+
 # Rota para visualizar vídeo em uma página dedicada
 @app.route("/video/<video_id>/view")
 def view_video(video_id):
-    with manager.sqlite3.connect(manager.DB_PATH) as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT id, original_name, filter, created_at FROM videos WHERE id = ?", (video_id,))
-        video = cur.fetchone()
+    video = db.query_one("SELECT id, original_name, filter, created_at FROM videos WHERE id = ?", (video_id,))
     
     if not video:
         return "Vídeo não encontrado", 404
@@ -537,7 +808,7 @@ def view_video(video_id):
             <div class="video-info">
                 <h1 class="video-title">{{ video[1] }}</h1>
                 <div class="video-meta">
-                    <p>Filtro: {{ video[2] | title }} | Data: {{ video[3] }}</p>
+                    <p>Filtro: {{ describe_filter(video[2]) }} | Data: {{ video[3] }}</p>
                     <p>ID: {{ video[0] }}</p>
                 </div>
             </div>
@@ -546,63 +817,136 @@ def view_video(video_id):
     </body>
     </html>
     """
-    return render_template_string(template, video=video)
+    return render_template_string(template, video=video, describe_filter=registry.describe)
 
 # Rota para deletar vídeo
 @app.route("/video/<video_id>/delete", methods=["POST"])
 def delete_video(video_id):
     import shutil
     
-    with manager.sqlite3.connect(manager.DB_PATH) as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT id FROM videos WHERE id = ?", (video_id,))
-        if not cur.fetchone():
-            return "Vídeo não encontrado", 404
-        
-        # Remove do banco
-        cur.execute("DELETE FROM videos WHERE id = ?", (video_id,))
-        conn.commit()
+    # Resolve antes de apagar a linha: o caminho vem do banco
+    video_files = resolver.resolve(video_id)
+    # Remove do banco
+    if db.execute("DELETE FROM videos WHERE id = ?", (video_id,)) == 0:
+        return "Vídeo não encontrado", 404
+
+    # O cache de resultados deixa de apontar para os arquivos que vão ser apagados
+    cache.release(video_id)
     
     # Remove arquivos físicos
-    for root_dir, sub_dirs, files in os.walk(paths.VIDEOS):
-        if video_id in root_dir:
-            shutil.rmtree(root_dir)
-            break
+    resolver.invalidate(video_id)
+    if video_files:
+        shutil.rmtree(video_files["dir"], ignore_errors=True)
     
     return redirect(url_for("index"))
 
 # Rota para API JSON (útil para integrações)
+# Campos que /api/videos pode devolver (?fields=); as URLs são montadas a partir do id
+API_COLUMNS = ["id", "original_name", "filter", "created_at", "duration_sec", "fps", "width", "height", "size_bytes"]
+API_URL_FIELDS = {"video_url": "serve_video", "thumbnail_url": "serve_thumb"}
+API_DEFAULT_FIELDS = ["id", "original_name", "filter", "created_at", "video_url", "thumbnail_url"]
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+
+def encode_cursor(created_at, video_id):
+    return base64.urlsafe_b64encode(json.dumps([created_at, video_id]).encode()).decode()
+
+def decode_cursor(cursor):
+    """Levanta ValueError se o cursor não foi gerado por encode_cursor."""
+    try:
+        created_at, video_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Cursor inválido")
+    return created_at, video_id
+
 @app.route("/api/videos")
 def api_videos():
-    with manager.sqlite3.connect(manager.DB_PATH) as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT id, original_name, filter, created_at FROM videos ORDER BY created_at DESC")
-        rows = cur.fetchall()
-    
+    """Lista paginada por cursor, do mais novo para o mais antigo.
+
+    Parâmetros: limit, cursor (next_cursor da página anterior), fields (lista separada
+    por vírgula), filter, since/until (prefixo ISO de created_at, ex.: 2025-09-01).
+    """
+    # A resposta só depende do banco e da query: se o cliente já tem essa versão, nada é consultado
+    etag = hashlib.md5(f"{manager.videos_version()}|{request.host_url}|{request.query_string.decode()}".encode()).hexdigest()
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    limit = min(max(request.args.get("limit", API_PAGE_SIZE, type=int), 1), API_MAX_PAGE_SIZE)
+    fields = request.args.get("fields")
+    fields = [field.strip() for field in fields.split(",")] if fields else API_DEFAULT_FIELDS
+    unknown = [field for field in fields if field not in API_COLUMNS and field not in API_URL_FIELDS]
+    if unknown:
+        return f"Campo desconhecido: {', '.join(unknown)}", 400
+
+    # id e created_at sempre vêm do banco: formam o cursor
+    columns = ["id", "created_at"] + [field for field in fields if field in API_COLUMNS and field not in ("id", "created_at")]
+    where, params = [], []
+    if request.args.get("filter"):
+        where.append("filter = ?")
+        params.append(request.args["filter"])
+    if request.args.get("since"):
+        where.append("created_at >= ?")
+        params.append(request.args["since"])
+    if request.args.get("until"):
+        # Prefixo de data: "2025-09-30" inclui o dia inteiro
+        where.append("created_at < ?")
+        params.append(request.args["until"] + "\uffff")
+    if request.args.get("cursor"):
+        try:
+            params.extend(decode_cursor(request.args["cursor"]))
+        except ValueError as e:
+            return str(e), 400
+        where.append("(created_at, id) < (?, ?)")
+
+    query = f"SELECT {', '.join(columns)} FROM videos"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    rows = db.query(query, params)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
     videos = []
     for row in rows:
-        videos.append({
-            'id': row[0],
-            'original_name': row[1],
-            'filter': row[2],
-            'created_at': row[3],
-            'video_url': url_for('serve_video', video_id=row[0], _external=True),
-            'thumbnail_url': url_for('serve_thumb', video_id=row[0], _external=True)
-        })
-    
-    return {'videos': videos}
+        video = {}
+        for field in fields:
+            if field in API_URL_FIELDS:
+                video[field] = url_for(API_URL_FIELDS[field], video_id=row["id"], _external=True)
+            else:
+                video[field] = row[field]
+        videos.append(video)
+
+    response = jsonify({"videos": videos, "next_cursor": next_cursor})
+    response.set_etag(etag)
+    return response
 
 @app.route("/filters")
 def list_filters():
     return {
-        "available_filters": [
-            {"name": "gray", "description": "Escala de Cinza"},
-            {"name": "edges", "description": "Detecção de Bordas"},
-            {"name": "pixel", "description": "Pixelização"}
-        ]
+        "available_filters": registry.available(),
+        "chain_separator": registry.CHAIN_SEPARATOR
     }
 
+@app.route("/api/cache")
+def cache_stats():
+    """Acertos/falhas do cache de resultados (uploads repetidos com o mesmo filtro)."""
+    return cache.stats()
+
+
 
+# O pool de workers sobe junto com o app, em qualquer runner (gunicorn, app.run sem reloader),
+# e já retoma os jobs que ficaram pendentes. Não sobe nos próprios workers (o spawn reimporta
+# este módulo) nem no processo do reloader do modo debug, que só vigia os arquivos.
+_reloader_parent = __name__ == "__main__" and os.environ.get("WERKZEUG_RUN_MAIN") != "true"
+if multiprocessing.current_process().name == "MainProcess" and not _reloader_parent:
+    job_queue.start()
 
 if __name__ == "__main__":
     app.run(debug=True, port=5000, host="0.0.0.0")
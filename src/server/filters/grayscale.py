@@ -1,6 +0,0 @@
-# filters/grayscale.py
-import cv2
-
-def apply(frame):
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
@@ -0,0 +1,143 @@
+# jobs/queue.py
+import os
+import time
+import uuid
+import datetime
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from database import db
+from jobs import tasks
+
+# Número de processos worker (configurável pela variável de ambiente VIDEO_WORKERS)
+MAX_WORKERS = int(os.environ.get("VIDEO_WORKERS", os.cpu_count() or 1))
+# Intervalo mínimo entre gravações do progresso de um job, em segundos
+PROGRESS_INTERVAL = 0.5
+
+_executor = None
+_executor_lock = threading.Lock()
+_max_workers = MAX_WORKERS
+
+def _now():
+    return datetime.datetime.now().isoformat()
+
+def _update(job_id, **fields):
+    columns = ", ".join(f"{name} = ?" for name in fields)
+    db.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+def start(max_workers=MAX_WORKERS):
+    """Inicia o pool de workers e reenfileira os jobs que ficaram pendentes."""
+    global _executor, _max_workers
+    with _executor_lock:
+        if _executor is not None:
+            return
+        _max_workers = max_workers
+        _executor = _new_executor()
+
+    with db.transaction() as conn:
+        conn.execute("UPDATE jobs SET status = 'queued', started_at = NULL, progress = NULL WHERE status = 'running'")
+        pending = [row["id"] for row in conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at")]
+
+    for job_id in pending:
+        _submit(job_id)
+
+def _new_executor():
+    # "spawn" evita herdar locks das threads do Flask no fork
+    return ProcessPoolExecutor(max_workers=_max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+def _replace_broken(broken):
+    """Troca o pool quebrado (um worker morreu: OOM, crash no cv2) por um novo; só a primeira
+    thread que perceber troca."""
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = _new_executor()
+
+def _submit(job_id):
+    executor = _executor
+    try:
+        future = executor.submit(run_job, job_id)
+    except BrokenProcessPool:
+        _replace_broken(executor)
+        executor = _executor
+        try:
+            future = executor.submit(run_job, job_id)
+        except BrokenProcessPool as e:
+            _update(job_id, status="failed", error=f"Pool de workers indisponível: {e}", finished_at=_now())
+            return
+
+    def on_done(f):
+        if f.cancelled() or f.exception() is None:
+            return
+        # Falhas do próprio pool (ex.: worker morto) não passam pelo run_job
+        if isinstance(f.exception(), BrokenProcessPool):
+            _replace_broken(executor)
+            # Jobs que só esperavam no pool quebrado não chegaram a rodar: voltam para o novo
+            if get_job(job_id)["status"] == "queued":
+                _submit(job_id)
+                return
+        _update(job_id, status="failed", error=str(f.exception()), finished_at=_now())
+
+    future.add_done_callback(on_done)
+
+def enqueue(video_id, original_name, filter_type, input_path, input_size=None, input_checksum=None):
+    """Registra um job persistente para o upload e o envia ao pool. Retorna o id do job.
+
+    O upload pode ainda estar chegando (ver storage.ingest); nesse caso
+    `input_size` é o tamanho esperado, quando conhecido, e o checksum vem depois
+    por set_input.
+    """
+    job_id = str(uuid.uuid4())
+    db.execute("""
+        INSERT INTO jobs (id, video_id, status, filter, original_name, input_path, created_at, input_size, input_checksum)
+        VALUES (?, ?, 'queued', ?, ?, ?, ?, ?, ?)
+    """, (job_id, video_id, filter_type, original_name, input_path, _now(), input_size, input_checksum))
+
+    if _executor is None:
+        start()
+    else:
+        _submit(job_id)
+    return job_id
+
+def set_input(job_id, input_size, input_checksum):
+    """Registra tamanho e MD5 do upload depois que ele termina de chegar."""
+    _update(job_id, input_size=input_size, input_checksum=input_checksum)
+
+def get_job(job_id):
+    """Retorna o job como dict, ou None se não existir."""
+    row = db.query_one("SELECT * FROM jobs WHERE id = ?", (job_id,))
+    return dict(row) if row else None
+
+def _progress_writer(job_id):
+    """Callback de progresso do encode: grava a fração concluída em jobs.progress, no máximo
+    a cada PROGRESS_INTERVAL segundos (sem total conhecido, não grava nada)."""
+    last_write = 0.0
+
+    def report(frames_done, frame_count):
+        nonlocal last_write
+        now = time.monotonic()
+        if frame_count <= 0 or now - last_write < PROGRESS_INTERVAL:
+            return
+        last_write = now
+        _update(job_id, progress=round(min(frames_done / frame_count, 1.0), 3))
+
+    return report
+
+def run_job(job_id):
+    """Executa o job dentro do processo worker e grava o status no banco."""
+    # Reivindica o job de forma atômica: um job reenfileirado nunca roda duas vezes
+    claimed = db.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ? AND status = 'queued'",
+                         (_now(), job_id))
+    if claimed != 1:
+        return
+
+    job = get_job(job_id)
+    try:
+        tasks.process_upload(job["video_id"], job["original_name"], job["filter"], job["input_path"],
+                             job["input_size"], job["input_checksum"], _progress_writer(job_id))
+    except Exception as e:
+        _update(job_id, status="failed", error=str(e), finished_at=_now())
+        return
+    _update(job_id, status="done", progress=1.0, finished_at=_now())
@@ -0,0 +1,123 @@
+# jobs/tasks.py
+import os
+import shutil
+import logging
+import datetime
+import contextlib
+
+from storage import manager, paths, ingest, cache
+from database import db
+from processing.video import process_video
+from processing.parallel import SEGMENT_WORKERS, process_video_parallel
+from processing.pipeline import PIPELINE_THREADS, process_video_pipeline, format_stats
+
+logger = logging.getLogger(__name__)
+
+def process_upload(video_id, original_name, filter_type, input_path, input_size=None, input_checksum=None,
+                   progress=None):
+    """Processa um upload (filtro, thumbnail, meta.json e BD) e retorna o registro salvo.
+
+    Se o upload ainda estiver chegando, o decode acompanha os bytes recebidos.
+    Com o checksum já conhecido, um upload repetido com o mesmo filtro reaproveita
+    o resultado anterior (storage.cache) em vez de processar de novo.
+    `progress(frames_gravados, total_estimado)` acompanha o encode (ver processing.video).
+
+    Se falhar, a pasta do vídeo e o upload são apagados antes de repassar o erro:
+    um job falho não deixa arquivos sem registro no banco.
+    """
+    today_date = datetime.date.today()
+    output_directory = os.path.join(paths.VIDEOS, today_date.strftime("%Y"), today_date.strftime("%m"), today_date.strftime("%d"), video_id)
+    try:
+        result, cache_entry = _process(video_id, original_name, filter_type, input_path, input_size, input_checksum,
+                                       progress, output_directory)
+    except BaseException:
+        shutil.rmtree(output_directory, ignore_errors=True)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(input_path)
+        raise
+
+    # Já está no banco: uma falha daqui em diante não pode apagar os arquivos
+    if cache_entry:
+        cache.store(*cache_entry)
+    return result
+
+def _process(video_id, original_name, filter_type, input_path, input_size, input_checksum, progress, output_directory):
+    """Corpo de process_upload. Retorna (registro, argumentos de cache.store ou None)."""
+    video_paths = manager.create_video_dirs(output_directory, original_name, filter_type)
+
+    # Upload retomável (storage.uploads): chega completo, mas só com o MD5 de cada bloco
+    if not input_checksum and not os.path.exists(input_path + ingest.PART_SUFFIX):
+        input_checksum = manager.compute_checksum(input_path)
+
+    # Upload completo: o checksum já veio com o job e dá para consultar o cache
+    entry = None
+    if input_checksum and not os.path.exists(input_path + ingest.PART_SUFFIX):
+        entry = cache.lookup(cache.cache_key(input_checksum, filter_type))
+    if entry:
+        cache.reuse(entry, video_paths)
+        shutil.move(input_path, video_paths["original"])
+        return _finish(video_id, original_name, filter_type, video_paths, output_directory,
+                       entry["video_info"], entry["cache_key"]), None
+
+    # Upload ainda chegando: lê pelo GrowingFile; completo: o OpenCV lê o arquivo direto
+    growing = None
+    source = input_path
+    if os.path.exists(input_path + ingest.PART_SUFFIX):
+        growing = source = ingest.GrowingFile(input_path, input_size)
+
+    try:
+        # Uma única passada gera o vídeo, a thumbnail e os dados do meta.json
+        if SEGMENT_WORKERS > 1:
+            # Os segmentos fazem seek no arquivo: precisa dele completo
+            if growing:
+                growing.wait_complete()
+            video_info = process_video_parallel(input_path, video_paths["processed"], filter_type, SEGMENT_WORKERS,
+                                                thumbnail_path=video_paths["thumb"], progress=progress)
+        elif PIPELINE_THREADS > 0:
+            video_info = process_video_pipeline(source, video_paths["processed"], filter_type, PIPELINE_THREADS,
+                                                thumbnail_path=video_paths["thumb"], progress=progress)
+            logger.info("pipeline %s: %s", video_id, format_stats(video_info))
+        else:
+            video_info = process_video(source, video_paths["processed"], filter_type,
+                                       thumbnail_path=video_paths["thumb"], progress=progress)
+    finally:
+        if growing:
+            growing.close()
+
+    if growing and growing.aborted:
+        raise RuntimeError("Upload interrompido antes de terminar")
+    if video_info["frames"] == 0:
+        raise RuntimeError("Nenhum frame pôde ser lido: o arquivo enviado não é um vídeo válido ou está corrompido")
+
+    # O upload vira o original (move, sem cópia); o processado já foi escrito no destino
+    shutil.move(input_path, video_paths["original"])
+
+    # Upload que começou antes de terminar de chegar: o MD5 calculado durante a recepção
+    # foi gravado no job depois (queue.set_input); só recalcula se ainda não estiver lá
+    if not input_checksum:
+        row = db.query_one("SELECT input_checksum FROM jobs WHERE video_id = ?", (video_id,))
+        input_checksum = (row and row["input_checksum"]) or manager.compute_checksum(video_paths["original"])
+    key = cache.cache_key(input_checksum, filter_type)
+    result = _finish(video_id, original_name, filter_type, video_paths, output_directory, video_info, key)
+
+    cached_info = {field: video_info[field] for field in ("frames", "fps", "width", "height")}
+    cached_info["checksum"] = result["checksum"]
+    return result, (key, video_id, video_paths["processed"], video_paths["thumb"], cached_info)
+
+def _finish(video_id, original_name, filter_type, video_paths, output_directory, video_info, key):
+    """Grava meta.json e o registro no banco."""
+    result = manager.save_meta_json(
+        video_id,
+        original_name,
+        filter_type,
+        video_paths["original"],
+        video_paths["processed"],
+        video_paths["thumb"],
+        output_directory,
+        video_info
+    )
+    result["cache_key"] = key
+
+    # agora salvar no SQLite
+    manager.insert_video(result)
+    return result
@@ -0,0 +1,148 @@
+# processing/parallel.py
+import os
+import shutil
+import hashlib
+import tempfile
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from filters import registry
+from processing.video import open_writer, process_video
+from processing.thumbnails import Thumbnails
+
+# Processos por vídeo no modo por segmentos (VIDEO_SEGMENT_WORKERS); 1 mantém o modo serial
+SEGMENT_WORKERS = int(os.environ.get("VIDEO_SEGMENT_WORKERS", 1))
+
+# Segmentos menores que isso não compensam abrir mais um decoder
+MIN_SEGMENT_FRAMES = 120
+
+def split_ranges(frame_count, workers, min_frames=MIN_SEGMENT_FRAMES):
+    """Divide [0, frame_count) em intervalos contíguos; o último vai até o fim do arquivo (end=None)."""
+    workers = max(1, min(workers, frame_count // min_frames))
+    step = frame_count // workers
+    ranges = [(i * step, (i + 1) * step) for i in range(workers)]
+    ranges[-1] = (ranges[-1][0], None)
+    return ranges
+
+def _seek(video_capture, start):
+    """Posiciona a captura exatamente no frame `start`."""
+    if start == 0:
+        return
+    video_capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+    if int(video_capture.get(cv2.CAP_PROP_POS_FRAMES)) != start:
+        # Backend sem seek preciso: volta ao início e descarta frames até o ponto certo
+        video_capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        for _ in range(start):
+            if not video_capture.grab():
+                break
+
+def process_segment(input_path, output_path, start, end, filter_type, fourcc="mp4v", collect_digests=False, thumbnails=None):
+    """Filtra e codifica os frames [start, end) em um arquivo próprio. Retorna (frames, digests, tiles).
+
+    Com `thumbnails` (processing.thumbnails.Thumbnails), o segmento do frame 0 grava as
+    thumbnails e cada segmento devolve em `tiles` os quadros da sprite sheet do seu trecho.
+    """
+    video_capture = cv2.VideoCapture(input_path)
+    video_fps = video_capture.get(cv2.CAP_PROP_FPS)
+    frame_width = int(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    frame_height = int(video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    _seek(video_capture, start)
+
+    chain = registry.compile_chain(filter_type)
+    video_writer = open_writer(output_path, video_fps, (frame_width, frame_height), chain.mono, fourcc)
+
+    frames_written = 0
+    digests = []
+    while end is None or start + frames_written < end:
+        frame_read_success, frame = video_capture.read()
+        if not frame_read_success:
+            break
+
+        frame = chain.apply_native(frame)
+        if thumbnails:
+            thumbnails.add(start + frames_written, frame)
+        if collect_digests:
+            digests.append(hashlib.md5(frame.tobytes()).hexdigest())
+        video_writer.write(frame)
+        frames_written += 1
+
+    video_capture.release()
+    video_writer.release()
+    return frames_written, digests, thumbnails.tiles if thumbnails else {}
+
+def _join_segments(segment_paths, output_path):
+    """Junta os segmentos, na ordem, no arquivo final (ffmpeg concat, sem recodificar)."""
+    # Cada segmento começa em keyframe: basta concatenar os streams
+    list_path = os.path.join(os.path.dirname(segment_paths[0]), "segments.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for segment_path in segment_paths:
+            f.write(f"file '{os.path.abspath(segment_path)}'\n")
+    subprocess.run([shutil.which("ffmpeg"), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                    "-i", list_path, "-c", "copy", output_path], check=True)
+
+def process_video_parallel(input_path, output_path, filter_type="gray", workers=SEGMENT_WORKERS, collect_digests=False, thumbnail_path=None,
+                           progress=None):
+    """Processa o vídeo em segmentos de frames, um processo por segmento, e junta o resultado.
+
+    Retorna um dict com frames, fps, width e height; com `collect_digests`, inclui em
+    "digests" o MD5 de cada frame filtrado (no número de canais do filtro), na ordem do vídeo.
+    `progress(frames_gravados, total)` é chamado a cada segmento concluído.
+
+    Sem ffmpeg no PATH os segmentos não têm como ser juntados sem recodificar o vídeo
+    inteiro (mais lento que o serial): processa em série, ou levanta RuntimeError se
+    `collect_digests` foi pedido.
+    """
+    video_capture = cv2.VideoCapture(input_path)
+    video_fps = video_capture.get(cv2.CAP_PROP_FPS)
+    frame_width = int(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    frame_height = int(video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    frame_count = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    video_capture.release()
+
+    ranges = split_ranges(frame_count, workers)
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+    if collect_digests and not has_ffmpeg:
+        raise RuntimeError("O modo por segmentos precisa do ffmpeg")
+    if (len(ranges) == 1 or not has_ffmpeg) and not collect_digests:
+        return process_video(input_path, output_path, filter_type, thumbnail_path=thumbnail_path, progress=progress)
+
+    segment_dir = tempfile.mkdtemp(prefix="segments_", dir=os.path.dirname(os.path.abspath(output_path)))
+    segment_paths = [os.path.join(segment_dir, f"{index:04d}.mp4") for index in range(len(ranges))]
+    # O arquivo está completo: a contagem de frames fixa o intervalo da sprite sheet para todos os segmentos
+    thumbnails = Thumbnails(os.path.dirname(thumbnail_path), video_fps, frame_count) if thumbnail_path else None
+    try:
+        with ProcessPoolExecutor(max_workers=len(ranges), mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [
+                executor.submit(process_segment, input_path, segment_path, start, end, filter_type,
+                                collect_digests=collect_digests, thumbnails=thumbnails)
+                for segment_path, (start, end) in zip(segment_paths, ranges)
+            ]
+            if progress:
+                frames_done = 0
+                for future in as_completed(futures):
+                    frames_done += future.result()[0]
+                    progress(frames_done, frame_count)
+            results = [future.result() for future in futures]
+
+        _join_segments(segment_paths, output_path)
+    finally:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+
+    frames_written = sum(frames for frames, _, _ in results)
+    if thumbnails:
+        for _, _, tiles in results:
+            thumbnails.add_tiles(tiles)
+        thumbnails.finish(frames_written)
+
+    info = {
+        "frames": frames_written,
+        "fps": video_fps,
+        "width": frame_width,
+        "height": frame_height,
+    }
+    if collect_digests:
+        info["digests"] = [digest for _, segment_digests, _ in results for digest in segment_digests]
+    return info
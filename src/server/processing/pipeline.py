@@ -0,0 +1,221 @@
+# processing/pipeline.py
+import os
+import time
+import queue
+import threading
+
+import cv2
+
+from filters import registry
+from processing.video import open_capture, open_writer
+from processing.thumbnails import Thumbnails
+
+# Threads de filtro no modo pipeline (VIDEO_PIPELINE_THREADS); 0 desativa o modo
+PIPELINE_THREADS = int(os.environ.get("VIDEO_PIPELINE_THREADS", 0))
+
+# Capacidade de cada fila entre estágios: limita quantos frames ficam em memória
+QUEUE_SIZE = int(os.environ.get("VIDEO_PIPELINE_QUEUE", 16))
+
+_END = None
+
+class _Stage:
+    """Acumula o tempo ocupado de um estágio e o preenchimento médio da sua fila de saída."""
+
+    def __init__(self, name, threads=1):
+        self.name = name
+        self.threads = threads
+        self.busy_sec = 0.0
+        self.fill_samples = 0
+        self.fill_total = 0
+        self.lock = threading.Lock()
+
+    def add_busy(self, seconds):
+        with self.lock:
+            self.busy_sec += seconds
+
+    def sample_fill(self, out_queue):
+        with self.lock:
+            self.fill_samples += 1
+            self.fill_total += out_queue.qsize()
+
+    def report(self, elapsed, out_queue=None):
+        data = {
+            "threads": self.threads,
+            "busy_sec": round(self.busy_sec, 3),
+            "utilization": round(self.busy_sec / (elapsed * self.threads), 3) if elapsed > 0 else 0.0,
+        }
+        if out_queue is not None:
+            average_fill = self.fill_total / self.fill_samples if self.fill_samples else 0.0
+            data["queue_fill"] = round(average_fill / out_queue.maxsize, 3)
+        return data
+
+def _put(target_queue, item, stop):
+    while not stop.is_set():
+        try:
+            target_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def _acquire(semaphore, stop):
+    while not stop.is_set():
+        if semaphore.acquire(timeout=0.1):
+            return True
+    return False
+
+def _get(source_queue, stop):
+    while not stop.is_set():
+        try:
+            return True, source_queue.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return False, None
+
+def process_video_pipeline(input_path, output_path, filter_type="gray", filter_threads=PIPELINE_THREADS or 2, queue_size=QUEUE_SIZE, thumbnail_path=None,
+                           progress=None):
+    """Processa o vídeo com decode, filtro e encode em threads separadas ligadas por filas limitadas.
+
+    A ordem dos frames é preservada e as thumbnails/sprite sheet, se pedidas, saem
+    dos frames filtrados no encoder. `progress(frames_gravados, total_estimado)`, se
+    informado, é chamado pelo encoder (ver process_video). Retorna um dict com frames, fps, width, height e a ocupação de cada
+    estágio (ver format_stats).
+    """
+    video_capture = open_capture(input_path)
+    video_fps = video_capture.get(cv2.CAP_PROP_FPS)
+    frame_width = int(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    frame_height = int(video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    frame_count = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    thumbnails = None
+    if thumbnail_path:
+        thumbnails = Thumbnails(os.path.dirname(thumbnail_path), video_fps, frame_count)
+
+    chain = registry.compile_chain(filter_type)
+    video_writer = open_writer(output_path, video_fps, (frame_width, frame_height), chain.mono)
+
+    decoded = queue.Queue(maxsize=queue_size)
+    filtered = queue.Queue(maxsize=queue_size)
+    # Frames decodificados e ainda não gravados (filas, filtros e reordenação no encoder):
+    # sem esse limite, um filtro travado deixaria o buffer de reordenação crescer sem fim
+    in_flight = threading.BoundedSemaphore(queue_size + filter_threads)
+    stop = threading.Event()
+    errors = []
+
+    decode_stage = _Stage("decode")
+    filter_stage = _Stage("filter", filter_threads)
+    encode_stage = _Stage("encode")
+    frames_written = 0
+
+    def decoder():
+        index = 0
+        try:
+            while True:
+                if not _acquire(in_flight, stop):
+                    return
+                started = time.perf_counter()
+                frame_read_success, frame = video_capture.read()
+                decode_stage.add_busy(time.perf_counter() - started)
+                if not frame_read_success:
+                    break
+                decode_stage.sample_fill(decoded)
+                if not _put(decoded, (index, frame), stop):
+                    return
+                index += 1
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            for _ in range(filter_threads):
+                _put(decoded, _END, stop)
+
+    def filter_worker():
+        try:
+            while True:
+                ok, item = _get(decoded, stop)
+                if not ok or item is _END:
+                    break
+                index, frame = item
+                started = time.perf_counter()
+                frame = chain.apply_native(frame)
+                filter_stage.add_busy(time.perf_counter() - started)
+                filter_stage.sample_fill(filtered)
+                if not _put(filtered, (index, frame), stop):
+                    return
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(filtered, _END, stop)
+
+    threads = [threading.Thread(target=decoder, name="decode", daemon=True)]
+    threads += [threading.Thread(target=filter_worker, name=f"filter-{i}", daemon=True) for i in range(filter_threads)]
+
+    started_at = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    # Encoder na thread atual: reordena os frames que chegam fora de ordem dos filtros
+    pending = {}
+    finished_filters = 0
+    try:
+        while finished_filters < filter_threads:
+            ok, item = _get(filtered, stop)
+            if not ok:
+                break
+            if item is _END:
+                finished_filters += 1
+                continue
+            index, frame = item
+            pending[index] = frame
+            while frames_written in pending:
+                frame = pending.pop(frames_written)
+                if thumbnails:
+                    thumbnails.add(frames_written, frame)
+                started = time.perf_counter()
+                video_writer.write(frame)
+                encode_stage.add_busy(time.perf_counter() - started)
+                frames_written += 1
+                in_flight.release()
+            if progress:
+                progress(frames_written, frame_count)
+    except Exception as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        video_capture.release()
+        video_writer.release()
+
+    if errors:
+        raise errors[0]
+    if thumbnails:
+        thumbnails.finish(frames_written)
+
+    elapsed = time.perf_counter() - started_at
+    return {
+        "frames": frames_written,
+        "fps": video_fps,
+        "width": frame_width,
+        "height": frame_height,
+        "elapsed_sec": round(elapsed, 3),
+        "stages": {
+            "decode": decode_stage.report(elapsed, decoded),
+            "filter": filter_stage.report(elapsed, filtered),
+            "encode": encode_stage.report(elapsed),
+        },
+    }
+
+def format_stats(stats):
+    """Resumo de uma linha das estatísticas do pipeline, apontando o gargalo."""
+    stages = stats["stages"]
+    bottleneck = max(stages, key=lambda name: stages[name]["utilization"])
+    parts = []
+    for name, data in stages.items():
+        part = f"{name} {data['utilization']:.0%}"
+        if "queue_fill" in data:
+            part += f" (fila {data['queue_fill']:.0%})"
+        parts.append(part)
+    fps = stats["frames"] / stats["elapsed_sec"] if stats["elapsed_sec"] else 0
+    return f"{stats['frames']} frames, {fps:.1f} fps | " + ", ".join(parts) + f" | gargalo: {bottleneck}"
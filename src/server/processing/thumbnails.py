@@ -0,0 +1,126 @@
+# processing/thumbnails.py
+import os
+import json
+
+import cv2
+import numpy as np
+
+# Larguras geradas no ingest, em 16:9; a primeira é a thumb.jpg de sempre (160x90)
+THUMB_WIDTHS = (160, 320, 640)
+# Grava também .webp ao lado de cada .jpg (VIDEO_THUMB_WEBP=1)
+WEBP = os.environ.get("VIDEO_THUMB_WEBP", "0") == "1"
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+# Sprite sheet para scrubbing: quantidade aproximada de quadros e tamanho de cada um
+SPRITE_TILES = int(os.environ.get("VIDEO_SPRITE_TILES", 50))
+SPRITE_COLUMNS = 10
+TILE_SIZE = (160, 90)
+# Intervalo entre quadros quando o número de frames não é conhecido de antemão
+FALLBACK_INTERVAL_SEC = 10
+
+SPRITE_IMAGE = "sprite.jpg"
+SPRITE_VTT = "sprite.vtt"
+SPRITE_INDEX = "sprite.json"
+
+def thumb_filename(width, ext="jpg"):
+    """thumb.jpg para a menor largura (compatível com vídeos antigos), thumb_<largura>.<ext> para as outras."""
+    return f"thumb.{ext}" if width == THUMB_WIDTHS[0] else f"thumb_{width}.{ext}"
+
+def pick_width(requested):
+    """Menor largura pré-computada que cobre `requested` (ou a maior, se nenhuma cobrir)."""
+    for width in THUMB_WIDTHS:
+        if width >= requested:
+            return width
+    return THUMB_WIDTHS[-1]
+
+def _imwrite(path, image):
+    if path.endswith(".webp"):
+        cv2.imwrite(path, image, [cv2.IMWRITE_WEBP_QUALITY, WEBP_QUALITY])
+    else:
+        cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+
+def _timestamp(seconds):
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{seconds:06.3f}"
+
+class Thumbnails:
+    """Thumbnails em várias larguras e sprite sheet, a partir dos frames filtrados da passada de encode.
+
+    O frame 0 gera as thumbnails; a cada `interval` frames um quadro reduzido vai para
+    a sprite sheet, gravada em finish() com o índice em WebVTT e JSON.
+    """
+
+    def __init__(self, thumbs_dir, fps, frame_count=0, interval=None, tiles=SPRITE_TILES):
+        self.thumbs_dir = thumbs_dir
+        self.fps = fps if fps > 0 else 30
+        self.max_tiles = tiles
+        if interval is None:
+            # Contagem estimada pelo container; sem ela, um quadro a cada FALLBACK_INTERVAL_SEC
+            interval = frame_count // tiles if frame_count > 0 else int(self.fps * FALLBACK_INTERVAL_SEC)
+        self.interval = max(interval, 1)
+        self.tiles = {}
+
+    def add(self, index, frame):
+        if index == 0:
+            self.save_thumbnails(frame)
+        if index % self.interval == 0:
+            self.tiles[index] = cv2.resize(frame, TILE_SIZE, interpolation=cv2.INTER_AREA)
+            # Contagem subestimada: descarta um quadro sim, um não, e dobra o intervalo
+            if len(self.tiles) > 2 * self.max_tiles:
+                self.interval *= 2
+                self.tiles = {i: tile for i, tile in self.tiles.items() if i % self.interval == 0}
+
+    def add_batch(self, start_index, frames):
+        """Equivale a add() para cada frame da pilha, mas só visita os índices usados."""
+        offset = -start_index % self.interval
+        while offset < len(frames):
+            self.add(start_index + offset, frames[offset])
+            offset += 1 + (-(start_index + offset + 1) % self.interval)
+
+    def add_tiles(self, tiles):
+        """Junta quadros gerados em outro processo (segmentos do modo paralelo, mesmo intervalo)."""
+        self.tiles.update(tiles)
+
+    def save_thumbnails(self, frame):
+        for width in THUMB_WIDTHS:
+            thumbnail = cv2.resize(frame, (width, width * 9 // 16), interpolation=cv2.INTER_AREA)
+            _imwrite(os.path.join(self.thumbs_dir, thumb_filename(width)), thumbnail)
+            if WEBP:
+                _imwrite(os.path.join(self.thumbs_dir, thumb_filename(width, "webp")), thumbnail)
+
+    def finish(self, frames):
+        """Grava sprite.jpg, sprite.vtt e sprite.json. `frames` é o total de frames do vídeo."""
+        if not self.tiles:
+            return
+        indices = sorted(self.tiles)
+        tile_width, tile_height = TILE_SIZE
+        columns = min(SPRITE_COLUMNS, len(indices))
+        rows = (len(indices) + columns - 1) // columns
+
+        first_tile = self.tiles[indices[0]]
+        sheet = np.zeros((rows * tile_height, columns * tile_width, *first_tile.shape[2:]), np.uint8)
+        entries = []
+        for position, index in enumerate(indices):
+            x = (position % columns) * tile_width
+            y = (position // columns) * tile_height
+            sheet[y:y + tile_height, x:x + tile_width] = self.tiles[index]
+            end_index = indices[position + 1] if position + 1 < len(indices) else max(frames, index + 1)
+            entries.append({"start": index / self.fps, "end": end_index / self.fps, "x": x, "y": y})
+        _imwrite(os.path.join(self.thumbs_dir, SPRITE_IMAGE), sheet)
+
+        with open(os.path.join(self.thumbs_dir, SPRITE_VTT), "w", encoding="utf-8") as f:
+            f.write("WEBVTT\n")
+            for entry in entries:
+                f.write(f"\n{_timestamp(entry['start'])} --> {_timestamp(entry['end'])}\n"
+                        f"{SPRITE_IMAGE}#xywh={entry['x']},{entry['y']},{tile_width},{tile_height}\n")
+
+        with open(os.path.join(self.thumbs_dir, SPRITE_INDEX), "w", encoding="utf-8") as f:
+            json.dump({
+                "image": SPRITE_IMAGE,
+                "tile_width": tile_width,
+                "tile_height": tile_height,
+                "columns": columns,
+                "tiles": [{**entry, "start": round(entry["start"], 3), "end": round(entry["end"], 3)} for entry in entries],
+            }, f, indent=2)
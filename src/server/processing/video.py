@@ -0,0 +1,94 @@
+# processing/video.py
+import os
+
+import cv2
+import numpy as np
+
+from filters import registry
+from processing.thumbnails import Thumbnails
+
+# Frames lidos e filtrados por vez no modo serial
+BATCH_SIZE = int(os.environ.get("VIDEO_BATCH_SIZE", 32))
+
+# Teto de memória de cada pilha de frames (entrada e saída), em bytes
+BATCH_MAX_BYTES = 64 * 1024 * 1024
+
+def open_capture(source):
+    """Abre um VideoCapture a partir de um caminho ou de um objeto de leitura (read/seek).
+
+    Se o OpenCV não aceitar leitura por stream, espera o objeto terminar
+    (`wait_complete`) e abre o arquivo pelo nome.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return cv2.VideoCapture(source)
+    try:
+        return cv2.VideoCapture(source, cv2.CAP_FFMPEG, [])
+    except (cv2.error, TypeError):
+        source.wait_complete()
+        return cv2.VideoCapture(source.name)
+
+def open_writer(output_path, video_fps, frame_size, mono=False, fourcc="mp4v"):
+    """Abre o VideoWriter; com `mono` ele recebe frames de um canal (sem expandir para BGR)."""
+    video_codec = cv2.VideoWriter_fourcc(*fourcc)
+    return cv2.VideoWriter(output_path, video_codec, video_fps, frame_size, isColor=not mono)
+
+def process_video(input_path, output_path, filter_type="gray", batch_size=BATCH_SIZE, mono_output=True, thumbnail_path=None,
+                  progress=None):
+    """Filtra e codifica o vídeo em uma única passada.
+
+    `input_path` pode ser um caminho ou um objeto de leitura (ver open_capture).
+    Se `thumbnail_path` for informado, as thumbnails e a sprite sheet (ver
+    processing.thumbnails) saem dos frames filtrados, na pasta dele.
+    `progress(frames_gravados, total_estimado)` é chamado a cada pilha; o total
+    vem do container e é 0 quando desconhecido.
+    Retorna um dict com frames, fps, width e height do vídeo gerado.
+    """
+    video_capture = open_capture(input_path)
+    video_fps = video_capture.get(cv2.CAP_PROP_FPS)
+    frame_width = int(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    frame_height = int(video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    frame_count = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    thumbnails = None
+    if thumbnail_path:
+        thumbnails = Thumbnails(os.path.dirname(thumbnail_path), video_fps, frame_count)
+
+    # Filtros de saída monocromática (gray, edges) gravam direto em um canal
+    chain = registry.compile_chain(filter_type)
+    mono = mono_output and chain.mono
+    video_writer = open_writer(output_path, video_fps, (frame_width, frame_height), mono)
+
+    # Pilhas alocadas uma única vez: o decoder escreve direto nelas e o filtro na saída
+    frame_read_success, frame = video_capture.read()
+    if frame_read_success:
+        batch_size = max(1, min(batch_size, BATCH_MAX_BYTES // frame.nbytes))
+        frames = np.empty((batch_size, *frame.shape), np.uint8)
+        filtered = np.empty(frames.shape[:3] if mono else frames.shape, np.uint8)
+        frames[0] = frame
+
+    count = 1 if frame_read_success else 0
+    frames_written = 0
+    while frame_read_success:
+        while count < batch_size:
+            frame_read_success, frame = video_capture.read(frames[count])
+            if not frame_read_success:
+                break
+            if not np.shares_memory(frame, frames):
+                frames[count] = frame
+            count += 1
+
+        if count:
+            chain.apply_batch(frames[:count], filtered[:count])
+            if thumbnails:
+                thumbnails.add_batch(frames_written, filtered[:count])
+            for frame in filtered[:count]:
+                video_writer.write(frame)
+            frames_written += count
+            if progress:
+                progress(frames_written, frame_count)
+        count = 0
+
+    video_capture.release()
+    video_writer.release()
+    if thumbnails:
+        thumbnails.finish(frames_written)
+    return {"frames": frames_written, "fps": video_fps, "width": frame_width, "height": frame_height}
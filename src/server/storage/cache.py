@@ -0,0 +1,107 @@
+# storage/cache.py
+# Cache de resultados endereçado por conteúdo: MD5 do upload original + cadeia de filtros.
+# Um acerto cria o novo registro com hard links para o processado e a thumbnail já
+# existentes, sem decodificar nem codificar nada.
+#
+# Remoção: com hard links cada registro é dono dos próprios arquivos, então apagar o
+# vídeo de origem não quebra os outros; a entrada passa a apontar para outro vídeo com
+# a mesma chave e some quando não sobra nenhum. Entradas cujos arquivos sumiram por
+# fora são descartadas na consulta.
+import os
+import json
+import shutil
+import datetime
+
+from storage import resolver
+from database import db
+
+# Mudar quando os filtros passarem a gerar saídas diferentes: invalida o cache todo
+CACHE_VERSION = 1
+
+HITS = "result_cache_hits"
+MISSES = "result_cache_misses"
+
+def _count(conn, name):
+    conn.execute("""
+        INSERT INTO counters (name, value) VALUES (?, 1)
+        ON CONFLICT(name) DO UPDATE SET value = value + 1
+    """, (name,))
+
+def cache_key(input_checksum, filter_type):
+    """Chave do cache para um upload; `filter_type` já deve estar normalizado (registry.normalize)."""
+    return f"v{CACHE_VERSION}:{input_checksum}:{filter_type}"
+
+def lookup(key):
+    """Retorna a entrada do cache (com video_info como dict) ou None, contando acerto/falha."""
+    with db.transaction() as conn:
+        row = conn.execute("SELECT * FROM result_cache WHERE cache_key = ?", (key,)).fetchone()
+        if row and not (os.path.exists(row["path_processed"]) and os.path.exists(row["path_thumb"])):
+            # Arquivos apagados por fora: a entrada não serve mais
+            conn.execute("DELETE FROM result_cache WHERE cache_key = ?", (key,))
+            row = None
+        if row:
+            conn.execute("UPDATE result_cache SET hits = hits + 1 WHERE cache_key = ?", (key,))
+        _count(conn, HITS if row else MISSES)
+
+    if not row:
+        return None
+    entry = dict(row)
+    entry["video_info"] = json.loads(entry["video_info"])
+    return entry
+
+def store(key, video_id, path_processed, path_thumb, video_info):
+    """Registra a saída de um processamento; mantém a entrada existente, se houver."""
+    db.execute("""
+        INSERT OR IGNORE INTO result_cache (cache_key, video_id, path_processed, path_thumb, video_info, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (key, video_id, path_processed, path_thumb, json.dumps(video_info), datetime.datetime.now().isoformat()))
+
+def _link(src, dest):
+    """Hard link de src em dest; copia se o sistema de arquivos não suportar."""
+    if os.path.exists(dest):
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+def reuse(entry, video_paths):
+    """Coloca o processado e as thumbnails/sprite sheet da entrada nos caminhos do novo vídeo."""
+    _link(entry["path_processed"], video_paths["processed"])
+    source_dir = os.path.dirname(entry["path_thumb"])
+    thumbs_dir = os.path.dirname(video_paths["thumb"])
+    for name in os.listdir(source_dir):
+        _link(os.path.join(source_dir, name), os.path.join(thumbs_dir, name))
+
+def release(video_id):
+    """Chamado ao apagar um vídeo: repassa as entradas dele a outro vídeo da mesma chave ou as remove."""
+    with db.transaction() as conn:
+        entries = conn.execute("SELECT cache_key FROM result_cache WHERE video_id = ?", (video_id,)).fetchall()
+        for entry in entries:
+            heir = conn.execute("""
+                SELECT id, path_processed FROM videos
+                WHERE cache_key = ? AND id != ?
+                ORDER BY created_at DESC LIMIT 1
+            """, (entry["cache_key"], video_id)).fetchone()
+            if heir is None:
+                conn.execute("DELETE FROM result_cache WHERE cache_key = ?", (entry["cache_key"],))
+                continue
+            video_dir = resolver.video_dir(heir["id"], heir["path_processed"])
+            conn.execute("""
+                UPDATE result_cache SET video_id = ?, path_processed = ?, path_thumb = ?
+                WHERE cache_key = ?
+            """, (heir["id"], heir["path_processed"], os.path.join(video_dir, "thumbs", "thumb.jpg"), entry["cache_key"]))
+
+def stats():
+    """Contadores de acerto/falha e tamanho do cache."""
+    counters = dict(db.query("SELECT name, value FROM counters WHERE name IN (?, ?)", (HITS, MISSES)))
+    entries = db.query_one("SELECT COUNT(*) FROM result_cache")[0]
+    hits = counters.get(HITS, 0)
+    misses = counters.get(MISSES, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 3) if total else 0.0,
+        "entries": entries,
+    }
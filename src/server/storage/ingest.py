@@ -0,0 +1,185 @@
+# storage/ingest.py
+import io
+import os
+import time
+import hashlib
+
+# Sufixo do arquivo enquanto o upload ainda está chegando
+PART_SUFFIX = ".part"
+
+CHUNK_SIZE = 1024 * 1024
+
+# Bytes recebidos antes de liberar o processamento (cabeçalho do container já disponível)
+EARLY_START_BYTES = 1024 * 1024
+
+# Sem crescimento por esse tempo, o leitor considera o upload abandonado
+STALL_TIMEOUT = 300
+
+class UploadTooLarge(Exception):
+    pass
+
+class HashingWriter(io.RawIOBase):
+    """Arquivo de destino de um upload multipart: grava direto em disco e calcula o MD5 no caminho.
+
+    Usado como stream_factory do Werkzeug, evita o arquivo temporário e a cópia do save().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "w+b")
+        self.hasher = hashlib.md5()
+        self.size = 0
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def write(self, data):
+        self.hasher.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def readinto(self, buffer):
+        return self.file.readinto(buffer)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self.file.seek(offset, whence)
+
+    def tell(self):
+        return self.file.tell()
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        # O close da base chama flush(): o arquivo precisa estar aberto ainda
+        super().close()
+        self.file.close()
+
+    def hexdigest(self):
+        return self.hasher.hexdigest()
+
+def receive_stream(stream, dest_path, max_bytes, on_early_start=None):
+    """Grava o corpo da requisição em blocos em `dest_path` + PART_SUFFIX, calculando o MD5.
+
+    Depois de EARLY_START_BYTES chama `on_early_start()` uma vez, para o processamento
+    começar enquanto o resto ainda chega. Ao terminar renomeia para `dest_path` e
+    retorna (tamanho, md5). Levanta UploadTooLarge acima de `max_bytes`; em qualquer
+    erro o arquivo parcial é removido (e o leitor do outro lado desiste).
+    """
+    part_path = dest_path + PART_SUFFIX
+    hasher = hashlib.md5()
+    size = 0
+    started = False
+    try:
+        with open(part_path, "wb") as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload maior que {max_bytes} bytes")
+                f.write(chunk)
+                # Deixa os bytes visíveis para o worker que já está lendo
+                f.flush()
+                hasher.update(chunk)
+                if on_early_start and not started and size >= EARLY_START_BYTES:
+                    started = True
+                    on_early_start()
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    os.replace(part_path, dest_path)
+    if on_early_start and not started:
+        on_early_start()
+    return size, hasher.hexdigest()
+
+class GrowingFile(io.BufferedIOBase):
+    """Leitura de um upload que ainda está sendo recebido por receive_stream.
+
+    read() espera os bytes chegarem e só devolve EOF quando o upload termina. O
+    tamanho do arquivo (SEEK_END) vem de `expected_size` enquanto o upload não
+    acaba, para o demuxer não ter que esperar o fim. Pode ser passado direto ao
+    cv2.VideoCapture (OpenCV >= 4.10).
+    """
+
+    def __init__(self, path, expected_size=None, poll_interval=0.05):
+        self.name = path
+        self.part_path = path + PART_SUFFIX
+        self.expected_size = expected_size
+        self.poll_interval = poll_interval
+        self.aborted = False
+        try:
+            self.file = open(self.part_path, "rb")
+        except FileNotFoundError:
+            # Já terminou (ou nunca foi parcial)
+            self.file = open(path, "rb")
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def complete(self):
+        return os.path.exists(self.name)
+
+    def _size(self):
+        return os.fstat(self.file.fileno()).st_size
+
+    def _wait(self, needed_size):
+        """Espera o arquivo chegar a `needed_size` bytes ou o upload terminar/ser abandonado."""
+        last_size = -1
+        last_change = time.monotonic()
+        while not self.aborted:
+            size = self._size()
+            if size >= needed_size or self.complete():
+                return
+            if not os.path.exists(self.part_path) and not self.complete():
+                self.aborted = True
+                return
+            if size != last_size:
+                last_size, last_change = size, time.monotonic()
+            elif time.monotonic() - last_change > STALL_TIMEOUT:
+                self.aborted = True
+                return
+            time.sleep(self.poll_interval)
+
+    def wait_complete(self):
+        """Bloqueia até o upload terminar. Retorna False se ele foi abandonado."""
+        while not self.complete() and not self.aborted:
+            self._wait(self._size() + 1)
+        return not self.aborted
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            self.wait_complete()
+            return self.file.read()
+        self._wait(self.file.tell() + 1)
+        return self.file.read(size)
+
+    def read1(self, size=-1):
+        return self.read(size)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_END and not self.complete():
+            if self.expected_size is None:
+                self.wait_complete()
+            else:
+                return self.file.seek(self.expected_size + offset)
+        return self.file.seek(offset, whence)
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+        super().close()
@@ -2,60 +2,57 @@
 import os
 import json
 import hashlib
-import sqlite3
 import datetime
-import cv2
 import mimetypes
 
-
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-DB_PATH = os.path.join(BASE_DIR, "database", "videos.db")
+from database import db
 
 def init_db():
-    with sqlite3.connect(DB_PATH) as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS videos (
-                id TEXT PRIMARY KEY,
-                original_name TEXT,
-                original_ext TEXT,
-                mime_type TEXT,
-                size_bytes INTEGER,
-                duration_sec REAL,
-                fps REAL,
-                width INTEGER,
-                height INTEGER,
-                filter TEXT,
-                created_at TEXT,
-                path_original TEXT,
-                path_processed TEXT
-            )
-        """)
-        conn.commit()
+    """Cria/atualiza o esquema do banco (migrações em database/db.py)."""
+    db.migrate()
+
+def insert_video(record):
+    """Insere no banco o registro retornado por save_meta_json."""
+    db.execute("""
+        INSERT INTO videos (
+            id, original_name, original_ext, mime_type, size_bytes,
+            duration_sec, fps, width, height,
+            filter, created_at,
+            path_original, path_processed, cache_key, checksum
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        record["id"],
+        record["original_name"],
+        record["original_ext"],
+        record["mime_type"],
+        record["size_bytes"],
+        record["duration_sec"],
+        record["fps"],
+        record["width"],
+        record["height"],
+        record["filter"],
+        record["created_at"],
+        record["path_original"],
+        record["path_processed"],
+        record.get("cache_key"),
+        record.get("checksum")
+    ))
+
+def videos_version():
+    """Contador que muda sempre que a tabela videos é alterada."""
+    row = db.query_one("SELECT value FROM counters WHERE name = 'videos_version'")
+    return row[0] if row else 0
 
 def compute_checksum(file_path):
     """Calcula o checksum MD5 de um arquivo."""
     hasher = hashlib.md5()
     with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
             hasher.update(chunk)
     return hasher.hexdigest()
 
-def extract_video_info(video_path):
-    """Extrai informações básicas de um vídeo com OpenCV."""
-    cap = cv2.VideoCapture(video_path)
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-    duration_sec = frame_count / fps if fps > 0 else 0
-    cap.release()
-    return fps, width, height, duration_sec
-
-def save_meta_json(video_id, original_name, filter_type, video_path, thumb_path, output_dir):
-    """Organiza arquivos em pastas (original, processed, thumbs), gera meta.json e retorna dict completo para BD."""
-
-    # --- Criar estrutura de diretórios ---
+def create_video_dirs(output_dir, original_name, filter_type):
+    """Cria a estrutura de pastas (original, processed, thumbs) e retorna os caminhos finais."""
     original_dir = os.path.join(output_dir, "original")
     processed_dir = os.path.join(output_dir, "processed", filter_type)
     thumbs_dir = os.path.join(output_dir, "thumbs")
@@ -64,25 +61,28 @@ def save_meta_json(video_id, original_name, filter_type, video_path, thumb_path,
     os.makedirs(processed_dir, exist_ok=True)
     os.makedirs(thumbs_dir, exist_ok=True)
 
-    # --- Copiar/mover vídeo original e processado ---
     original_ext = os.path.splitext(original_name)[1].lstrip(".")
-    original_dest = os.path.join(original_dir, f"video.{original_ext}")
-    processed_dest = os.path.join(processed_dir, f"video.{original_ext}")
+    return {
+        "original": os.path.join(original_dir, f"video.{original_ext}"),
+        "processed": os.path.join(processed_dir, "video.mp4"),
+        "thumb": os.path.join(thumbs_dir, "thumb.jpg"),
+    }
 
-    # Se `video_path` já é o processado, você precisa salvar o original antes (upload)
-    if not os.path.exists(original_dest):
-        # copiar o original do upload
-        import shutil
-        shutil.copy2(video_path, original_dest)
+def save_meta_json(video_id, original_name, filter_type, original_dest, processed_dest, thumb_path, output_dir, video_info):
+    """Gera meta.json e retorna o dict completo para o BD.
 
-    # mover/renomear o processado
-    if video_path != processed_dest:
-        import shutil
-        shutil.move(video_path, processed_dest)
+    `video_info` vem da própria passada de processamento (frames, fps, width, height),
+    então o vídeo gerado não é decodificado de novo; só o checksum relê o arquivo
+    (ou nem isso, se `video_info` já trouxer "checksum", como num acerto do cache).
+    """
+    original_ext = os.path.splitext(original_name)[1].lstrip(".")
 
-    # --- Gerar dados do vídeo processado ---
-    fps, width, height, duration_sec = extract_video_info(processed_dest)
-    checksum = compute_checksum(processed_dest)
+    # --- Dados do vídeo processado ---
+    fps = video_info["fps"]
+    width = video_info["width"]
+    height = video_info["height"]
+    duration_sec = video_info["frames"] / fps if fps > 0 else 0
+    checksum = video_info.get("checksum") or compute_checksum(processed_dest)
 
     # --- JSON leve (para pasta) ---
     meta = {
@@ -96,6 +96,7 @@ def save_meta_json(video_id, original_name, filter_type, video_path, thumb_path,
         "width": width,
         "height": height,
         "duration_sec": duration_sec,
+        "frames": video_info["frames"],
         "path_original": original_dest,
         "path_processed": processed_dest,
         "path_thumb": thumb_path,
@@ -126,6 +127,7 @@ def save_meta_json(video_id, original_name, filter_type, video_path, thumb_path,
         "created_at": meta["created_at"],
         "path_original": original_dest,
         "path_processed": processed_dest,
+        "checksum": checksum,
     }
 
     return db_record
@@ -0,0 +1,74 @@
+# storage/resolver.py
+import os
+import threading
+import collections
+
+from database import db
+
+# Quantos vídeos ficam resolvidos em memória
+CACHE_SIZE = int(os.environ.get("VIDEO_RESOLVER_CACHE", "4096"))
+
+_cache = collections.OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+def video_dir(video_id, file_path):
+    """Pasta do vídeo (.../AAAA/MM/DD/<id>) a partir de qualquer arquivo dentro dela."""
+    parts = os.path.normpath(file_path).split(os.sep)
+    if video_id not in parts:
+        return None
+    return os.sep.join(parts[:parts.index(video_id) + 1])
+
+def _load(video_id):
+    row = db.query_one("SELECT path_original, path_processed FROM videos WHERE id = ?", (video_id,))
+    if row is None:
+        return None
+
+    path_original, path_processed = row
+    # Registros antigos guardam só um dos caminhos completo
+    directory = video_dir(video_id, path_processed or "") or video_dir(video_id, path_original or "")
+    if directory is None:
+        return None
+    if not path_processed or video_dir(video_id, path_processed) is None:
+        path_processed = os.path.join(directory, "video.mp4")
+    return {
+        "dir": directory,
+        "original": path_original,
+        "processed": path_processed,
+        "thumb": os.path.join(directory, "thumbs", "thumb.jpg"),
+    }
+
+def resolve(video_id):
+    """Caminhos do vídeo (dir, original, processed, thumb) pelo id, ou None se não existir.
+
+    Uma consulta pela chave primária na primeira vez; depois sai do cache LRU.
+    """
+    with _lock:
+        found = _cache.get(video_id)
+        if found is not None:
+            _cache.move_to_end(video_id)
+            _stats["hits"] += 1
+            return found
+        _stats["misses"] += 1
+
+    found = _load(video_id)
+    # Ids inexistentes não entram no cache: o vídeo pode ser inserido depois pelo worker
+    if found is not None:
+        with _lock:
+            _cache[video_id] = found
+            if len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return found
+
+def invalidate(video_id):
+    """Remove o vídeo do cache (chamar ao apagar)."""
+    with _lock:
+        _cache.pop(video_id, None)
+
+def clear():
+    with _lock:
+        _cache.clear()
+
+def cache_info():
+    with _lock:
+        return dict(_stats, size=len(_cache), maxsize=CACHE_SIZE)
@@ -0,0 +1,189 @@
+# storage/uploads.py
+# Uploads retomáveis: o cliente cria uma sessão com o tamanho total e envia o arquivo em
+# blocos (PUT com o offset), em qualquer número de conexões. Se uma cair, consulta o
+# offset confirmado e continua dali; nada do que já chegou é reenviado.
+#
+# Os blocos são gravados em sequência num único arquivo paths.INCOMING/<sessão>_<nome>.part,
+# então o finalize só renomeia (sem juntar pedaços). Cada bloco tem o MD5 conferido (se o
+# cliente mandar) e registrado em upload_chunks; um bloco interrompido ou com checksum
+# errado é descartado, truncando o arquivo de volta ao último offset confirmado.
+import os
+import time
+import uuid
+import hashlib
+import datetime
+import threading
+import contextlib
+
+from werkzeug.utils import secure_filename
+
+from storage import paths, ingest
+from database import db
+
+# Maior bloco aceito por PUT
+MAX_CHUNK_BYTES = 64 * 1024 * 1024
+# Sessões sem bloco novo há mais que isso são apagadas (VIDEO_UPLOAD_SESSION_HOURS)
+SESSION_TTL = int(os.environ.get("VIDEO_UPLOAD_SESSION_HOURS", 24)) * 3600
+# Intervalo mínimo entre duas coletas de sessões abandonadas, em segundos
+GC_INTERVAL = 600
+
+class SessionBusy(Exception):
+    pass
+
+class OffsetMismatch(Exception):
+    """O offset do bloco não é o que o servidor tem; `offset` é o valor confirmado."""
+
+    def __init__(self, offset):
+        super().__init__(f"Offset esperado: {offset}")
+        self.offset = offset
+
+class ChecksumMismatch(Exception):
+    pass
+
+class IncompleteChunk(Exception):
+    pass
+
+# Um bloco por vez em cada sessão (dentro deste processo)
+_locks = {}
+_locks_guard = threading.Lock()
+_last_gc = 0.0
+
+def _now():
+    return datetime.datetime.now().isoformat()
+
+@contextlib.contextmanager
+def _locked(session_id):
+    with _locks_guard:
+        lock = _locks.setdefault(session_id, threading.Lock())
+    if not lock.acquire(blocking=False):
+        raise SessionBusy("Outro bloco desta sessão ainda está sendo recebido")
+    try:
+        yield
+    finally:
+        lock.release()
+
+def _delete(session_id):
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM upload_chunks WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM upload_sessions WHERE id = ?", (session_id,))
+    with _locks_guard:
+        _locks.pop(session_id, None)
+
+def create(original_name, filter_type, size):
+    """Abre uma sessão para um arquivo de `size` bytes e retorna o registro dela."""
+    maybe_collect_garbage()
+    session_id = str(uuid.uuid4())
+    safe_name = secure_filename(original_name) or "upload"
+    part_path = os.path.join(paths.INCOMING, f"{session_id}_{safe_name}{ingest.PART_SUFFIX}")
+    open(part_path, "wb").close()
+
+    now = _now()
+    db.execute("""
+        INSERT INTO upload_sessions (id, original_name, filter, size, received, path, created_at, updated_at)
+        VALUES (?, ?, ?, ?, 0, ?, ?, ?)
+    """, (session_id, original_name, filter_type, size, part_path, now, now))
+    return get(session_id)
+
+def get(session_id):
+    """Sessão como dict (com `received`, o offset confirmado), ou None se não existir."""
+    row = db.query_one("SELECT * FROM upload_sessions WHERE id = ?", (session_id,))
+    return dict(row) if row else None
+
+def chunks(session_id):
+    """Blocos confirmados, em ordem: [{"start", "length", "md5"}]."""
+    return [dict(row) for row in db.query(
+        "SELECT start, length, md5 FROM upload_chunks WHERE session_id = ? ORDER BY start", (session_id,))]
+
+def write_chunk(session_id, offset, stream, md5=None, expected_length=None):
+    """Grava o bloco lido de `stream` a partir de `offset` e retorna o novo offset confirmado.
+
+    Retorna None se a sessão não existir. Levanta OffsetMismatch se `offset` não for o
+    offset confirmado, ChecksumMismatch se o MD5 não bater com `md5` (hex),
+    IncompleteChunk se chegarem menos que `expected_length` bytes (Content-Length) e
+    ingest.UploadTooLarge se o bloco passar de MAX_CHUNK_BYTES ou do tamanho da sessão.
+    """
+    with _locked(session_id):
+        session = get(session_id)
+        if session is None:
+            return None
+        if offset != session["received"]:
+            raise OffsetMismatch(session["received"])
+
+        hasher = hashlib.md5()
+        length = 0
+        try:
+            with open(session["path"], "r+b") as f:
+                f.seek(offset)
+                while True:
+                    block = stream.read(ingest.CHUNK_SIZE)
+                    if not block:
+                        break
+                    length += len(block)
+                    if length > MAX_CHUNK_BYTES or offset + length > session["size"]:
+                        raise ingest.UploadTooLarge("Bloco passa do tamanho declarado na sessão")
+                    hasher.update(block)
+                    f.write(block)
+            if expected_length is not None and length != expected_length:
+                raise IncompleteChunk(f"Bloco incompleto: {length} de {expected_length} bytes")
+            if md5 and hasher.hexdigest() != md5.lower():
+                raise ChecksumMismatch("MD5 do bloco não confere")
+        except BaseException:
+            # Conexão caiu no meio ou bloco inválido: descarta o que foi gravado dele
+            os.truncate(session["path"], offset)
+            raise
+
+        with db.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO upload_chunks (session_id, start, length, md5) VALUES (?, ?, ?, ?)",
+                         (session_id, offset, length, hasher.hexdigest()))
+            conn.execute("UPDATE upload_sessions SET received = ?, updated_at = ? WHERE id = ?",
+                         (offset + length, _now(), session_id))
+        return offset + length
+
+def finalize(session_id):
+    """Fecha a sessão completa e retorna o registro com `path` apontando para o arquivo final.
+
+    Retorna None se a sessão não existir; levanta OffsetMismatch se faltar algum byte.
+    """
+    with _locked(session_id):
+        session = get(session_id)
+        if session is None:
+            return None
+        if session["received"] != session["size"]:
+            raise OffsetMismatch(session["received"])
+        final_path = session["path"][:-len(ingest.PART_SUFFIX)]
+        os.replace(session["path"], final_path)
+        _delete(session_id)
+    return dict(session, path=final_path)
+
+def abort(session_id):
+    """Cancela a sessão e apaga o que já foi recebido. Retorna False se ela não existir."""
+    with _locked(session_id):
+        session = get(session_id)
+        if session is None:
+            return False
+        _remove_file(session["path"])
+        _delete(session_id)
+    return True
+
+def _remove_file(path):
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+def collect_garbage(max_age=SESSION_TTL):
+    """Apaga as sessões sem atividade há mais de `max_age` segundos. Retorna quantas apagou."""
+    cutoff = (datetime.datetime.now() - datetime.timedelta(seconds=max_age)).isoformat()
+    removed = 0
+    for row in db.query("SELECT id FROM upload_sessions WHERE updated_at < ?", (cutoff,)):
+        # Sessão recebendo um bloco agora não está abandonada
+        with contextlib.suppress(SessionBusy):
+            removed += abort(row["id"])
+    return removed
+
+def maybe_collect_garbage():
+    """collect_garbage(), no máximo uma vez a cada GC_INTERVAL segundos por processo."""
+    global _last_gc
+    now = time.monotonic()
+    if now - _last_gc < GC_INTERVAL:
+        return
+    _last_gc = now
+    collect_garbage()
@@ -0,0 +1,97 @@
+# tests/test_parallel.py
+# O modo por segmentos (processing/parallel.py) tem que gerar exatamente os mesmos frames
+# filtrados que o caminho serial. Rodar da raiz: python -m pytest tests
+import os
+import sys
+import shutil
+import hashlib
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "server"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from filters import registry
+from processing import parallel
+from processing.video import process_video
+
+# Três segmentos de MIN_SEGMENT_FRAMES
+FRAMES = 3 * parallel.MIN_SEGMENT_FRAMES
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg não está no PATH")
+
+
+@pytest.fixture(scope="module")
+def synthetic_video(tmp_path_factory):
+    """Vídeo com frames distintos (número do frame desenhado)."""
+    path = str(tmp_path_factory.mktemp("video") / "input.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 30, (320, 240))
+    for index in range(FRAMES):
+        frame = np.full((240, 320, 3), (index * 7 % 256, 90, 160), np.uint8)
+        cv2.putText(frame, str(index), (20, 120), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def serial_digests(input_path, filter_type):
+    chain = registry.compile_chain(filter_type)
+    video_capture = cv2.VideoCapture(input_path)
+    digests = []
+    while True:
+        ok, frame = video_capture.read()
+        if not ok:
+            break
+        digests.append(hashlib.md5(chain.apply_native(frame).tobytes()).hexdigest())
+    video_capture.release()
+    return digests
+
+
+def count_frames(path):
+    video_capture = cv2.VideoCapture(path)
+    count = 0
+    while video_capture.grab():
+        count += 1
+    video_capture.release()
+    return count
+
+
+def test_split_ranges_covers_every_frame():
+    ranges = parallel.split_ranges(FRAMES, 4, min_frames=30)
+    assert len(ranges) == 4
+    assert ranges[0][0] == 0 and ranges[-1][1] is None
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+
+
+@pytest.mark.parametrize("filter_type", ["gray", "edges", "pixel"])
+def test_segments_match_serial(synthetic_video, tmp_path, filter_type):
+    """Cada segmento começa no frame certo (seek exato) e filtra igual ao serial."""
+    digests = []
+    for index, (start, end) in enumerate(parallel.split_ranges(FRAMES, 4, min_frames=30)):
+        frames, segment_digests, _ = parallel.process_segment(
+            synthetic_video, str(tmp_path / f"{index}.mp4"), start, end, filter_type, collect_digests=True)
+        assert frames == len(segment_digests)
+        digests += segment_digests
+    assert digests == serial_digests(synthetic_video, filter_type)
+
+
+@needs_ffmpeg
+def test_parallel_matches_serial(synthetic_video, tmp_path):
+    serial_path, parallel_path = str(tmp_path / "serial.mp4"), str(tmp_path / "parallel.mp4")
+    process_video(synthetic_video, serial_path, "gray")
+    info = parallel.process_video_parallel(synthetic_video, parallel_path, "gray", 3, collect_digests=True)
+
+    assert info["digests"] == serial_digests(synthetic_video, "gray")
+    assert info["frames"] == count_frames(parallel_path) == count_frames(serial_path) == FRAMES
+
+
+def test_without_ffmpeg_falls_back_to_serial(synthetic_video, tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel.shutil, "which", lambda name: None)
+    output_path = str(tmp_path / "output.mp4")
+    info = parallel.process_video_parallel(synthetic_video, output_path, "gray", 4)
+    assert info["frames"] == count_frames(output_path) == FRAMES
+
+    with pytest.raises(RuntimeError):
+        parallel.process_video_parallel(synthetic_video, output_path, "gray", 4, collect_digests=True)
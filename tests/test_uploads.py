@@ -0,0 +1,147 @@
+# tests/test_uploads.py
+# Protocolo de upload retomável (rotas /uploads do api.py e storage/uploads.py) pelo cliente
+# de teste do Flask, com banco e mídia numa pasta temporária. Rodar da raiz: python -m pytest tests
+import os
+import sys
+import time
+import hashlib
+import datetime
+
+import cv2
+import numpy as np
+import pytest
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "server")
+sys.path.insert(0, SERVER_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+# Tempo máximo de espera pelo job depois do finalize
+JOB_TIMEOUT = 120
+
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    """api.py importado com cwd e VIDEO_DB_PATH numa pasta temporária (os workers herdam os dois)."""
+    root = tmp_path_factory.mktemp("server")
+    (root / "server").mkdir()
+    previous_cwd = os.getcwd()
+    previous_db = os.environ.get("VIDEO_DB_PATH")
+    # paths.MEDIA_ROOT é "../media", relativo ao cwd
+    os.chdir(root / "server")
+    os.environ["VIDEO_DB_PATH"] = str(root / "videos.db")
+
+    from database import db
+    db.configure(os.environ["VIDEO_DB_PATH"])
+    import api
+    from storage import paths
+    # paths cria as pastas ao ser importado, que pode ter sido antes do chdir
+    for directory in (paths.INCOMING, paths.VIDEOS):
+        os.makedirs(directory, exist_ok=True)
+    yield api
+
+    os.chdir(previous_cwd)
+    if previous_db is None:
+        os.environ.pop("VIDEO_DB_PATH", None)
+    else:
+        os.environ["VIDEO_DB_PATH"] = previous_db
+
+
+@pytest.fixture(scope="module")
+def client(api):
+    return api.app.test_client()
+
+
+@pytest.fixture(scope="module")
+def video_bytes(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("video") / "input.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 30, (160, 120))
+    for index in range(30):
+        frame = np.full((120, 160, 3), (index * 8 % 256, 90, 160), np.uint8)
+        cv2.putText(frame, str(index), (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 2)
+        writer.write(frame)
+    writer.release()
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def create(client, data):
+    response = client.post("/uploads", json={"filename": "video.mp4", "filter": "gray", "size": len(data)})
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def put(client, session_id, offset, chunk, md5=None):
+    headers = {"Upload-Offset": str(offset)}
+    if md5 is not None:
+        headers["X-Chunk-MD5"] = md5
+    return client.put(f"/uploads/{session_id}", data=chunk, headers=headers)
+
+
+def test_full_upload_ends_in_done_job(client, video_bytes):
+    session = create(client, video_bytes)
+    assert session["offset"] == 0
+    half = len(video_bytes) // 2
+    for offset, chunk in ((0, video_bytes[:half]), (half, video_bytes[half:])):
+        response = put(client, session["id"], offset, chunk, hashlib.md5(chunk).hexdigest())
+        assert response.status_code == 200
+        assert response.get_json()["offset"] == offset + len(chunk)
+        assert response.headers["Upload-Offset"] == str(offset + len(chunk))
+
+    status = client.get(f"/uploads/{session['id']}").get_json()
+    assert status["offset"] == len(video_bytes)
+    assert len(status["chunks"]) == 2
+
+    response = client.post(f"/uploads/{session['id']}/finalize")
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+    deadline = time.monotonic() + JOB_TIMEOUT
+    while True:
+        job = client.get(f"/jobs/{job_id}").get_json()
+        if job["status"] in ("done", "failed") or time.monotonic() > deadline:
+            break
+        time.sleep(0.2)
+    assert job["status"] == "done", job
+
+
+def test_wrong_offset_returns_current_offset(client, video_bytes):
+    session = create(client, video_bytes)
+    assert put(client, session["id"], 0, video_bytes[:1000]).status_code == 200
+
+    response = put(client, session["id"], 0, video_bytes[:1000])
+    assert response.status_code == 409
+    assert response.get_json()["offset"] == 1000
+    assert response.headers["Upload-Offset"] == "1000"
+
+
+def test_bad_checksum_truncates_to_last_good_offset(api, client, video_bytes):
+    session = create(client, video_bytes)
+    assert put(client, session["id"], 0, video_bytes[:1000]).status_code == 200
+
+    chunk = video_bytes[1000:3000]
+    response = put(client, session["id"], 1000, chunk, hashlib.md5(b"outro conteudo").hexdigest())
+    assert response.status_code == 400
+    assert client.get(f"/uploads/{session['id']}").get_json()["offset"] == 1000
+    assert os.path.getsize(api.uploads.get(session["id"])["path"]) == 1000
+
+
+def test_finalize_before_complete(client, video_bytes):
+    session = create(client, video_bytes)
+    assert put(client, session["id"], 0, video_bytes[:1000]).status_code == 200
+
+    response = client.post(f"/uploads/{session['id']}/finalize")
+    assert response.status_code == 409
+    assert response.get_json()["offset"] == 1000
+
+
+def test_garbage_collection_removes_expired_session(api, client, video_bytes):
+    from database import db
+    session = create(client, video_bytes)
+    assert put(client, session["id"], 0, video_bytes[:1000]).status_code == 200
+    path = api.uploads.get(session["id"])["path"]
+
+    expired = (datetime.datetime.now() - datetime.timedelta(seconds=api.uploads.SESSION_TTL + 60)).isoformat()
+    db.execute("UPDATE upload_sessions SET updated_at = ? WHERE id = ?", (expired, session["id"]))
+    assert api.uploads.collect_garbage() >= 1
+    assert api.uploads.get(session["id"]) is None
+    assert not os.path.exists(path)
+    assert client.get(f"/uploads/{session['id']}").status_code == 404